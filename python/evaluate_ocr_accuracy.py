@@ -8,172 +8,25 @@ Calculates OCR accuracy metrics for PDF and Image inputs:
 
 import os
 import re
-import json
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-from difflib import SequenceMatcher
+from typing import Dict, List, Tuple
 from calculate_ocr_accuracy import (
-    calculate_character_accuracy,
-    calculate_word_accuracy,
-    normalize_text
+    char_accuracy_from_normalized,
+    word_accuracy_from_normalized,
+    normalize_text,
+    read_text_file
+)
+from evaluation_common import (
+    FIELD_NAMES,
+    calculate_field_accuracies,
+    evaluate_by_ground_truth,
+    extract_fields_from_markdown,
+    format_input_type_summary,
+    json_loads,
+    load_ground_truth,
+    normalized_ground_truth_text
 )
-
-
-def extract_title_from_markdown(markdown: str) -> Optional[str]:
-    """Extract title from markdown (usually first # header or first line)"""
-    lines = markdown.strip().split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        # Check for markdown header
-        if line.startswith('#'):
-            # Remove # symbols and return
-            title = re.sub(r'^#+\s*', '', line).strip()
-            if title:
-                return title
-        # If first non-empty line doesn't start with #, it might be the title
-        elif len([l for l in lines if l.strip()]) > 0:
-            # Check if it looks like a title (not too long, not author info)
-            if len(line) < 200 and not '@' in line and not 'University' in line:
-                return line
-    return None
-
-
-def extract_author_from_markdown(markdown: str) -> Optional[str]:
-    """Extract author from markdown (usually after title, often in caps or with email)"""
-    lines = markdown.strip().split('\n')
-    found_title = False
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Skip title
-        if line.startswith('#') or (i == 0 and len(line) < 200):
-            found_title = True
-            continue
-        
-        # Look for author patterns
-        if found_title:
-            # Pattern 1: All caps line (common for author names)
-            if line.isupper() and len(line) > 5 and len(line) < 200:
-                return line
-            # Pattern 2: Contains email
-            if '@' in line:
-                return line
-            # Pattern 3: Contains "University" or similar
-            if any(keyword in line for keyword in ['University', 'Institute', 'College', 'Lab']):
-                return line
-            # Pattern 4: Name pattern (capitalized words)
-            if re.match(r'^[A-Z][a-z]+ [A-Z]', line) and len(line) < 200:
-                return line
-    
-    return None
-
-
-def extract_section_from_markdown(markdown: str, section_name: str) -> Optional[str]:
-    """Extract a specific section (Abstract, Introduction, Conclusion) from markdown"""
-    # Normalize section name for matching
-    section_lower = section_name.lower()
-    
-    # Patterns to match section headers
-    patterns = [
-        rf'^#+\s*{section_name}',
-        rf'^#+\s*\d+\.?\s*{section_name}',
-        rf'^#+\s*{section_name}',
-        rf'###\s*\d+\.?\s*{section_name}',
-        rf'##\s*{section_name}',
-    ]
-    
-    lines = markdown.split('\n')
-    in_section = False
-    section_content = []
-    current_header_level = None
-    
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        
-        # Check if this line is a header matching our section
-        if not in_section:
-            for pattern in patterns:
-                if re.match(pattern, stripped, re.IGNORECASE):
-                    in_section = True
-                    # Get header level
-                    if stripped.startswith('#'):
-                        current_header_level = len(stripped) - len(stripped.lstrip('#'))
-                    break
-        else:
-            # Check if we've hit another header at same or higher level
-            if stripped.startswith('#'):
-                header_level = len(stripped) - len(stripped.lstrip('#'))
-                if current_header_level and header_level <= current_header_level:
-                    # End of section
-                    break
-            
-            # Collect content
-            if stripped:
-                section_content.append(stripped)
-    
-    if section_content:
-        return '\n'.join(section_content)
-    
-    return None
-
-
-def extract_fields_from_markdown(markdown: str) -> Dict[str, Optional[str]]:
-    """Extract all fields from markdown"""
-    return {
-        'Title': extract_title_from_markdown(markdown),
-        'Author': extract_author_from_markdown(markdown),
-        'Abstract': extract_section_from_markdown(markdown, 'Abstract'),
-        'Introduction': extract_section_from_markdown(markdown, 'Introduction'),
-        'Conclusion': extract_section_from_markdown(markdown, 'Conclusion'),
-    }
-
-
-def load_ground_truth(gt_path: str) -> Dict[str, str]:
-    """
-    Load ground truth from file.
-    Supports:
-    - Plain text file (all content as one field)
-    - JSON file with field structure: {"Title": "...", "Author": "...", etc.}
-    """
-    if not os.path.exists(gt_path):
-        raise FileNotFoundError(f"Ground truth file not found: {gt_path}")
-    
-    with open(gt_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Try to parse as JSON first
-    try:
-        gt_data = json.loads(content)
-        if isinstance(gt_data, dict):
-            return gt_data
-    except json.JSONDecodeError:
-        pass
-    
-    # If not JSON, treat as plain text
-    # Try to extract fields from plain text if it has structure
-    # Otherwise, return as single "Content" field
-    return {'Content': content}
-
-
-def calculate_field_accuracy(gt_field: str, ocr_field: Optional[str]) -> Tuple[float, bool]:
-    """
-    Calculate accuracy for a specific field.
-    Returns: (accuracy_percentage, was_extracted)
-    """
-    if not ocr_field:
-        return 0.0, False
-    
-    if not gt_field:
-        return 0.0, False
-    
-    # Calculate character-level accuracy for the field
-    accuracy, _, _, _ = calculate_character_accuracy(gt_field, ocr_field)
-    return accuracy, True
 
 
 def evaluate_document(
@@ -199,38 +52,33 @@ def evaluate_document(
     if not os.path.exists(ocr_markdown_path):
         raise FileNotFoundError(f"OCR markdown file not found: {ocr_markdown_path}")
     
-    with open(ocr_markdown_path, 'r', encoding='utf-8') as f:
-        ocr_markdown = f.read()
+    ocr_markdown = read_text_file(ocr_markdown_path)
     
     # Extract fields from OCR markdown
     ocr_fields = extract_fields_from_markdown(ocr_markdown)
     
-    # Get full text for overall accuracy
-    gt_full_text = gt_fields.get('Content', '')
-    if not gt_full_text:
-        # Combine all fields if no "Content" field
-        gt_full_text = ' '.join([v for v in gt_fields.values() if v])
-    
-    ocr_full_text = ocr_markdown
+    # Get normalized full text for overall accuracy
+    gt_normalized = normalized_ground_truth_text(ground_truth_path)
+    ocr_normalized = normalize_text(ocr_markdown)
     
     # Calculate overall OCR accuracy
-    char_accuracy, correct_chars, total_chars, char_errors = calculate_character_accuracy(
-        gt_full_text, ocr_full_text
+    char_accuracy, correct_chars, total_chars, char_errors = char_accuracy_from_normalized(
+        gt_normalized, ocr_normalized
     )
-    word_accuracy, correct_words, total_words, word_errors = calculate_word_accuracy(
-        gt_full_text, ocr_full_text
+    word_accuracy, correct_words, total_words, word_errors = word_accuracy_from_normalized(
+        gt_normalized, ocr_normalized
     )
     
     # Calculate field-level accuracy
     field_results = {}
-    field_names = ['Title', 'Author', 'Abstract', 'Introduction', 'Conclusion']
+    field_accuracies = calculate_field_accuracies(gt_fields, ocr_fields, FIELD_NAMES)
     
-    for field_name in field_names:
+    for field_name in FIELD_NAMES:
         gt_field = gt_fields.get(field_name, '')
         ocr_field = ocr_fields.get(field_name)
         
         if gt_field:
-            accuracy, extracted = calculate_field_accuracy(gt_field, ocr_field)
+            accuracy, extracted = field_accuracies[field_name]
             field_results[field_name] = {
                 'accuracy': round(accuracy, 2),
                 'extracted': extracted,
@@ -267,99 +115,61 @@ def evaluate_document(
     }
 
 
+def evaluate_task(task: Tuple[str, str, str]) -> Dict:
+    """evaluate_document for a (ground_truth_path, ocr_markdown_path, input_type) tuple"""
+    return evaluate_document(*task)
+
+
+def evaluate_documents(tasks: List[Tuple[str, str, str]]) -> List[Dict]:
+    """
+    Evaluate many documents, in input order, spread over a process pool
+    (see evaluate_by_ground_truth)
+    """
+    return evaluate_by_ground_truth(evaluate_task, tasks, itemgetter(0))
+
+
 def print_evaluation_report(results: List[Dict]):
     """Print formatted evaluation report"""
-    print("\n" + "="*80)
-    print("OCR ACCURACY EVALUATION REPORT")
-    print("="*80 + "\n")
+    # Collect the whole report and write it with a single print
+    report = [
+        "\n" + "="*80,
+        "OCR ACCURACY EVALUATION REPORT",
+        "="*80 + "\n",
+    ]
     
     # Separate PDF and Image results
     pdf_results = [r for r in results if r['input_type'] == 'PDF']
     image_results = [r for r in results if r['input_type'] == 'Image']
     
-    # PDF Input Evaluation
     if pdf_results:
-        print("Evaluation - PDF Input")
-        print("-" * 80)
-        
-        # Calculate averages
-        avg_char_acc = sum(r['overall']['character_level']['accuracy'] for r in pdf_results) / len(pdf_results)
-        avg_word_acc = sum(r['overall']['word_level']['accuracy'] for r in pdf_results) / len(pdf_results)
-        
-        print("OCR Accuracy")
-        print(f"  - Character-level: {avg_char_acc:.2f}%")
-        print(f"  - Word-level:      {avg_word_acc:.2f}%")
-        print()
-        
-        # Field-level averages
-        field_names = ['Title', 'Author', 'Abstract', 'Introduction', 'Conclusion']
-        print("Field-level Extraction Accuracy")
-        
-        for field_name in field_names:
-            field_accs = []
-            for r in pdf_results:
-                field_data = r['field_level'].get(field_name, {})
-                if field_data.get('accuracy') is not None:
-                    field_accs.append(field_data['accuracy'])
-            
-            if field_accs:
-                avg_field_acc = sum(field_accs) / len(field_accs)
-                print(f"  - {field_name}: {avg_field_acc:.2f}%")
-            else:
-                print(f"  - {field_name}: N/A")
-        print()
+        report.append(format_input_type_summary('PDF', pdf_results))
     
-    # Image Input Evaluation
     if image_results:
-        print("Evaluation - Image Input")
-        print("-" * 80)
-        
-        # Calculate averages
-        avg_char_acc = sum(r['overall']['character_level']['accuracy'] for r in image_results) / len(image_results)
-        avg_word_acc = sum(r['overall']['word_level']['accuracy'] for r in image_results) / len(image_results)
-        
-        print("OCR Accuracy")
-        print(f"  - Character-level: {avg_char_acc:.2f}%")
-        print(f"  - Word-level:      {avg_word_acc:.2f}%")
-        print()
-        
-        # Field-level averages
-        field_names = ['Title', 'Author', 'Abstract', 'Introduction', 'Conclusion']
-        print("Field-level Extraction Accuracy")
-        
-        for field_name in field_names:
-            field_accs = []
-            for r in image_results:
-                field_data = r['field_level'].get(field_name, {})
-                if field_data.get('accuracy') is not None:
-                    field_accs.append(field_data['accuracy'])
-            
-            if field_accs:
-                avg_field_acc = sum(field_accs) / len(field_accs)
-                print(f"  - {field_name}: {avg_field_acc:.2f}%")
-            else:
-                print(f"  - {field_name}: N/A")
-        print()
+        report.append(format_input_type_summary('Image', image_results))
     
     # Detailed results per document
-    print("\n" + "="*80)
-    print("DETAILED RESULTS BY DOCUMENT")
-    print("="*80 + "\n")
+    report.append("\n" + "="*80)
+    report.append("DETAILED RESULTS BY DOCUMENT")
+    report.append("="*80 + "\n")
     
     for result in results:
-        print(f"Document: {result['ocr_file']} ({result['input_type']})")
-        print(f"  Character-level: {result['overall']['character_level']['accuracy']:.2f}%")
-        print(f"  Word-level:      {result['overall']['word_level']['accuracy']:.2f}%")
-        print("  Field-level:")
-        for field_name in ['Title', 'Author', 'Abstract', 'Introduction', 'Conclusion']:
+        lines = [
+            f"Document: {result['ocr_file']} ({result['input_type']})",
+            f"  Character-level: {result['overall']['character_level']['accuracy']:.2f}%",
+            f"  Word-level:      {result['overall']['word_level']['accuracy']:.2f}%",
+            "  Field-level:",
+        ]
+        for field_name in FIELD_NAMES:
             field_data = result['field_level'].get(field_name, {})
+            extracted = "✓" if field_data['extracted'] else "✗"
             if field_data.get('accuracy') is not None:
-                extracted = "✓" if field_data['extracted'] else "✗"
-                print(f"    - {field_name}: {field_data['accuracy']:.2f}% {extracted}")
+                lines.append(f"    - {field_name}: {field_data['accuracy']:.2f}% {extracted}")
             else:
-                extracted = "✓" if field_data['extracted'] else "✗"
-                print(f"    - {field_name}: N/A {extracted}")
-        print()
+                lines.append(f"    - {field_name}: N/A {extracted}")
+        lines.append("")
+        report.append("\n".join(lines))
+    
+    print("\n".join(report))
 
 
 def main():
@@ -380,32 +190,30 @@ def main():
     
     args = parser.parse_args()
     
-    results = []
+    # (ground_truth_path, ocr_markdown_path, input_type) for each document
+    tasks = []
     
     # Single file evaluation
     if args.gt_file and args.ocr_file:
-        result = evaluate_document(args.gt_file, args.ocr_file, args.input_type or 'PDF')
-        results.append(result)
+        tasks.append((args.gt_file, args.ocr_file, args.input_type or 'PDF'))
     
     # Config file evaluation
     elif args.config:
-        with open(args.config, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = json_loads(read_text_file(args.config))
         
         for item in config:
             gt_path = item['ground_truth']
             ocr_path = item['ocr_markdown']
             input_type = item.get('input_type', 'PDF')
-            result = evaluate_document(gt_path, ocr_path, input_type)
-            results.append(result)
+            tasks.append((gt_path, ocr_path, input_type))
     
     # Directory-based evaluation (auto-match files)
     elif args.gt_dir and (args.pdf_dir or args.image_dir):
         gt_files = {}
-        for file in os.listdir(args.gt_dir):
-            if file.endswith(('.txt', '.json')):
-                base_name = os.path.splitext(file)[0]
-                gt_files[base_name] = os.path.join(args.gt_dir, file)
+        with os.scandir(args.gt_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(('.txt', '.json')) and entry.is_file():
+                    gt_files[os.path.splitext(entry.name)[0]] = entry.path
         
         # PDF files
         if args.pdf_dir:
@@ -413,31 +221,23 @@ def main():
                 if file.endswith('.md'):
                     base_name = os.path.splitext(file)[0]
                     if base_name in gt_files:
-                        result = evaluate_document(gt_files[base_name], 
-                                                  os.path.join(args.pdf_dir, file), 
-                                                  'PDF')
-                        results.append(result)
+                        tasks.append((gt_files[base_name], os.path.join(args.pdf_dir, file), 'PDF'))
         
         # Image files
-        if args.image_dir:
+        if args.image_dir and gt_files:
+            # Index ground truth names once: longest prefix wins, then any substring
+            gt_lengths = sorted({len(gt_base) for gt_base in gt_files}, reverse=True)
+            gt_pattern = re.compile('|'.join(map(re.escape, sorted(gt_files, key=len, reverse=True))))
             for file in os.listdir(args.image_dir):
                 if file.endswith('.md'):
                     base_name = os.path.splitext(file)[0]
                     # Try to match (might have _page-0001_0 suffix)
-                    matched = False
-                    for gt_base in gt_files.keys():
-                        if base_name.startswith(gt_base) or gt_base in base_name:
-                            result = evaluate_document(gt_files[gt_base], 
-                                                      os.path.join(args.image_dir, file), 
-                                                      'Image')
-                            results.append(result)
-                            matched = True
-                            break
-                    if not matched and base_name in gt_files:
-                        result = evaluate_document(gt_files[base_name], 
-                                                  os.path.join(args.image_dir, file), 
-                                                  'Image')
-                        results.append(result)
+                    gt_base = next((base_name[:n] for n in gt_lengths if base_name[:n] in gt_files), None)
+                    if gt_base is None:
+                        match = gt_pattern.search(base_name)
+                        gt_base = match.group(0) if match else None
+                    if gt_base is not None:
+                        tasks.append((gt_files[gt_base], os.path.join(args.image_dir, file), 'Image'))
     
     else:
         print("Usage examples:")
@@ -467,6 +267,8 @@ def main():
         """)
         return
     
+    results = evaluate_documents(tasks)
+    
     if results:
         print_evaluation_report(results)
     else:
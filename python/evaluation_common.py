@@ -0,0 +1,258 @@
+"""
+Shared helpers for the OCR evaluation scripts (evaluate_all.py and
+evaluate_ocr_accuracy.py): ground-truth loading, markdown field
+extraction, running evaluations in a process pool and field-level
+accuracy summaries.
+"""
+
+import os
+import re
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from calculate_ocr_accuracy import (
+    calculate_character_accuracy,
+    normalize_text,
+    read_text_file
+)
+
+try:
+    # orjson parses large ground-truth and config files several times faster
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+HEADER_PREFIX_RE = re.compile(r'^#+\s*')
+HEADER_HASHES_RE = re.compile(r'#+')
+NAME_LINE_RE = re.compile(r'^[A-Z][a-z]+ [A-Z]')
+# Email or affiliation keyword, found with a single scan of the line
+AUTHOR_HINT_RE = re.compile(r'@|University|Institute|College|Lab')
+
+# All section headers extract_fields_from_markdown looks for, in one pattern;
+# the named group that matched is the section name
+SECTION_HEADERS_RE = re.compile(
+    r'^(#+)\s*(?:\d+\.?\s*)?'
+    r'(?:(?P<Abstract>Abstract)|(?P<Introduction>Introduction)|(?P<Conclusion>Conclusion))',
+    re.IGNORECASE
+)
+
+# Fields reported per document, in report order
+FIELD_NAMES = ['Title', 'Author', 'Abstract', 'Introduction', 'Conclusion']
+
+
+def extract_fields_from_markdown(markdown: str) -> Dict[str, Optional[str]]:
+    """
+    Extract all fields from markdown in a single pass over its lines:
+    Title (first header or short first line), Author (first name, caps,
+    email or affiliation line after it) and the Abstract, Introduction and
+    Conclusion sections, each running until the next header at the same
+    or higher level.
+    """
+    section_names = ('Abstract', 'Introduction', 'Conclusion')
+    title = None
+    author = None
+    found_title = False
+    first_line = True
+    pending_sections = list(section_names)
+    # Header level of each section currently being collected
+    open_sections = {}
+    section_content = {name: [] for name in section_names}
+    
+    for line in markdown.split('\n'):
+        stripped = line.strip()
+        header = HEADER_HASHES_RE.match(stripped)
+        
+        # Sections run until a header at the same or higher level
+        for name, level in list(open_sections.items()):
+            if header and header.end() <= level:
+                del open_sections[name]
+            elif stripped:
+                section_content[name].append(stripped)
+        if header and pending_sections:
+            match = SECTION_HEADERS_RE.match(stripped)
+            if match and match.lastgroup in pending_sections:
+                pending_sections.remove(match.lastgroup)
+                open_sections[match.lastgroup] = len(match.group(1))
+        
+        if not stripped:
+            continue
+        
+        if title is None:
+            if header:
+                title = HEADER_PREFIX_RE.sub('', stripped).strip() or None
+            elif len(stripped) < 200 and '@' not in stripped and 'University' not in stripped:
+                title = stripped
+        
+        if author is None:
+            # Headers and the first line are title candidates, never authors
+            if header or (first_line and len(stripped) < 200):
+                found_title = True
+            elif found_title and (
+                (stripped.isupper() and 5 < len(stripped) < 200)
+                or AUTHOR_HINT_RE.search(stripped)
+                or (NAME_LINE_RE.match(stripped) and len(stripped) < 200)
+            ):
+                author = stripped
+        first_line = False
+        
+        if title is not None and author is not None and not pending_sections and not open_sections:
+            break
+    
+    fields = {'Title': title, 'Author': author}
+    for name in section_names:
+        fields[name] = '\n'.join(section_content[name]) if section_content[name] else None
+    return fields
+
+
+def load_ground_truth(
+    gt_path: str,
+    plain_text_fields: Optional[Callable[[str], Dict[str, Optional[str]]]] = None
+) -> Dict[str, str]:
+    """
+    Load ground truth from file.
+    Supports:
+    - Plain text file (all content as "Content", plus the fields
+      plain_text_fields extracts from it, if given)
+    - JSON file with field structure: {"Title": "...", "Author": "...", etc.}
+    Parsed files are cached, so the PDF and Image evaluations of a
+    document share one load; callers get their own copy of the fields.
+    """
+    return dict(_load_ground_truth_cached(gt_path, plain_text_fields))
+
+
+@lru_cache(maxsize=None)
+def _load_ground_truth_cached(
+    gt_path: str,
+    plain_text_fields: Optional[Callable[[str], Dict[str, Optional[str]]]] = None
+) -> Dict[str, str]:
+    """load_ground_truth without the defensive copy"""
+    if not os.path.exists(gt_path):
+        raise FileNotFoundError(f"Ground truth file not found: {gt_path}")
+    
+    content = read_text_file(gt_path)
+    
+    # Only a JSON object can hold fields, so skip the parse attempt (and the
+    # exception it raises) for plain-text files that can't be one
+    if content.lstrip()[:1] == '{':
+        try:
+            gt_data = json_loads(content)
+            if isinstance(gt_data, dict):
+                return gt_data
+        except json.JSONDecodeError:
+            pass
+    
+    # If not JSON, extract fields from plain text when a parser is given
+    fields = plain_text_fields(content) if plain_text_fields else {}
+    # Also include full content for overall accuracy calculation
+    fields['Content'] = content
+    return fields
+
+
+@lru_cache(maxsize=None)
+def normalized_ground_truth_text(
+    gt_path: str,
+    plain_text_fields: Optional[Callable[[str], Dict[str, Optional[str]]]] = None
+) -> str:
+    """Normalized full ground-truth text used for overall accuracy (cached per file)"""
+    gt_fields = _load_ground_truth_cached(gt_path, plain_text_fields)
+    gt_full_text = gt_fields.get('Content', '')
+    if not gt_full_text:
+        # Combine all fields if no "Content" field
+        gt_full_text = ' '.join([v for v in gt_fields.values() if v])
+    return normalize_text(gt_full_text)
+
+
+def calculate_field_accuracies(
+    gt_fields: Dict[str, str],
+    ocr_fields: Dict[str, Optional[str]],
+    field_names: List[str]
+) -> Dict[str, Tuple[float, bool]]:
+    """
+    Calculate character-level accuracy for each named field.
+    Returns: {field_name: (accuracy_percentage, was_extracted)}
+    """
+    field_accuracies = {}
+    for name in field_names:
+        gt_field = gt_fields.get(name)
+        ocr_field = ocr_fields.get(name)
+        # Only fields present on both sides are compared
+        if gt_field and ocr_field:
+            accuracy, _, _, _ = calculate_character_accuracy(gt_field, ocr_field)
+            field_accuracies[name] = (accuracy, True)
+        else:
+            field_accuracies[name] = (0.0, False)
+    return field_accuracies
+
+
+def _evaluate_each(evaluate: Callable[[Any], Any], tasks: List) -> List:
+    """evaluate for each of several tasks, in order (one process pool task)"""
+    return [evaluate(task) for task in tasks]
+
+
+def evaluate_by_ground_truth(
+    evaluate: Callable[[Any], Any],
+    tasks: List,
+    ground_truth_path: Callable[[Any], str]
+) -> List:
+    """
+    evaluate(task) for every task, returned in input order.
+    Documents are independent and CPU-bound, so they are spread over a
+    process pool, one pool task per ground-truth file (given by
+    ground_truth_path(task)): the PDF and Image evaluations of a document
+    then run in the same process and share its cached ground-truth load and
+    memoized accuracy results. A single ground-truth file is evaluated
+    inline, without starting worker processes.
+    evaluate must be a module-level function, so it can be sent to the workers.
+    """
+    groups = {}
+    for index, task in enumerate(tasks):
+        groups.setdefault(ground_truth_path(task), []).append(index)
+    
+    if len(groups) <= 1:
+        return _evaluate_each(evaluate, tasks)
+    
+    results = [None] * len(tasks)
+    with ProcessPoolExecutor() as executor:
+        group_results = executor.map(
+            partial(_evaluate_each, evaluate),
+            [[tasks[i] for i in indices] for indices in groups.values()]
+        )
+        for indices, group in zip(groups.values(), group_results):
+            for index, result in zip(indices, group):
+                results[index] = result
+    return results
+
+
+def format_input_type_summary(input_type: str, type_results: List[Dict]) -> str:
+    """Format average OCR and field-level accuracy for one input type"""
+    # Accumulate every average in a single pass over the results
+    char_total = 0.0
+    word_total = 0.0
+    field_totals = dict.fromkeys(FIELD_NAMES, 0.0)
+    field_counts = dict.fromkeys(FIELD_NAMES, 0)
+    for r in type_results:
+        char_total += r['overall']['character_level']['accuracy']
+        word_total += r['overall']['word_level']['accuracy']
+        for field_name in FIELD_NAMES:
+            accuracy = r['field_level'].get(field_name, {}).get('accuracy')
+            if accuracy is not None:
+                field_totals[field_name] += accuracy
+                field_counts[field_name] += 1
+    
+    lines = [
+        f"Evaluation - {input_type} Input",
+        "-" * 80,
+        "OCR Accuracy",
+        f"  - Character-level: {char_total / len(type_results):.2f}%",
+        f"  - Word-level:      {word_total / len(type_results):.2f}%",
+        "",
+        "Field-level Extraction Accuracy",
+    ]
+    for field_name in FIELD_NAMES:
+        if field_counts[field_name]:
+            lines.append(f"  - {field_name}: {field_totals[field_name] / field_counts[field_name]:.2f}%")
+        else:
+            lines.append(f"  - {field_name}: N/A")
+    lines.append("")
+    return "\n".join(lines)
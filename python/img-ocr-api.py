@@ -1,19 +1,44 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from paddleocr import PPStructureV3
 import os
+import asyncio
 import sys
 import io
-import glob
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Set stdout encoding to UTF-8 for Windows console
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
+# Shared session so status callbacks reuse keep-alive connections
+callback_session = requests.Session()
+callback_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+callback_session.mount("http://", callback_adapter)
+callback_session.mount("https://", callback_adapter)
+
+# PPStructureV3 is not thread-safe, so OCR runs on a single worker thread
+ocr_executor = ThreadPoolExecutor(max_workers=1)
+
+ALLOWED_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'bmp', 'tiff', 'tif', 'gif', 'webp'})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the pipeline when the worker starts, not on its first request
+    app.state.pipeline = PPStructureV3()
+    yield
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -24,14 +49,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize pipeline globally
-pipeline = None
-
-def get_pipeline():
-    global pipeline
-    if pipeline is None:
-        pipeline = PPStructureV3()
-    return pipeline
+def process_images(ocr_pipeline, image_files: list, output_path: Path):
+    """
+    Run OCR on the images and save markdown/JSON for each result.
+    Blocking; img_ocr runs it on ocr_executor.
+    """
+    # Predict all images in one call so the pipeline can batch them
+    outputs = ocr_pipeline.predict([str(img_path) for img_path in image_files])
+    
+    # Results come back in input order; count pages per input so a
+    # multi-page image still gets {name}_{idx} files like two-column-test.py
+    page_counts = {}
+    for res in outputs:
+        input_path = res["input_path"]
+        idx = page_counts.get(input_path, 0)
+        page_counts[input_path] = idx + 1
+        name_base = os.path.splitext(os.path.basename(input_path))[0]
+        
+        # Save markdown and images using res.save_to_markdown()
+        save_path = str(output_path / f"{name_base}_{idx}")
+        res.save_to_json(save_path=save_path)
+        res.save_to_markdown(save_path=save_path)
+        print(f"[SAVE] Saved markdown and images to: {save_path}")
 
 @app.get("/health")
 async def health_check():
@@ -39,6 +78,7 @@ async def health_check():
 
 @app.post("/imgOcr")
 async def img_ocr(
+    request: Request,
     groupname: str = Query(..., description="Group name for organizing output files"),
     extraction_result_id: str = Query(None, description="Extraction result ID for status callback"),
     document_id: str = Query(None, description="Document ID for status callback"),
@@ -63,14 +103,12 @@ async def img_ocr(
                 detail=f"Directory not found: {documents_dir}"
             )
         
-        allowed_extensions = ['jpg', 'jpeg', 'png', 'bmp', 'tiff', 'tif', 'gif', 'webp']
-        
         # Process all image files in directory (like two-column-test.py)
-        image_files = []
-        for ext in allowed_extensions:
-            image_files.extend(glob.glob(str(documents_dir / f"*.{ext}")))
-            image_files.extend(glob.glob(str(documents_dir / f"*.{ext.upper()}")))
-        image_files = [Path(f) for f in image_files]
+        with os.scandir(documents_dir) as entries:
+            image_files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1][1:].lower() in ALLOWED_EXTENSIONS
+            ]
         
         if not image_files:
             raise HTTPException(
@@ -78,30 +116,20 @@ async def img_ocr(
                 detail=f"No image files found in: {documents_dir}"
             )
         
-        # Get pipeline
-        ocr_pipeline = get_pipeline()
+        # Get pipeline (loaded at startup)
+        ocr_pipeline = request.app.state.pipeline
         
         # Prepare output directory
         output_path = project_root / "server" / "uploads" / "ocr-results" / groupname
         output_path.mkdir(parents=True, exist_ok=True)
         
-        processed_files = []
+        # Run the blocking OCR off the event loop so /health stays responsive
+        print(f"[INFO] Processing {len(image_files)} image(s) in {documents_dir}")
+        await asyncio.get_running_loop().run_in_executor(
+            ocr_executor, process_images, ocr_pipeline, image_files, output_path
+        )
         
-        # Process each image file (like two-column-test.py)
-        for img_path in image_files:
-            print(f"[INFO] Processing image: {img_path}")
-            output = ocr_pipeline.predict(str(img_path))
-            name_base = os.path.splitext(os.path.basename(img_path))[0]
-            
-            # Save markdown and images using res.save_to_markdown()
-            for idx, res in enumerate(output):
-                # Save with unique name like two-column-test.py: {name}_{idx}.md
-                save_path = str(output_path / f"{name_base}_{idx}")
-                res.save_to_json(save_path=save_path)
-                res.save_to_markdown(save_path=save_path)
-                print(f"[SAVE] Saved markdown and images to: {save_path}")
-            
-            processed_files.append(str(img_path.relative_to(project_root)))
+        processed_files = [str(img_path.relative_to(project_root)) for img_path in image_files]
         
         # Call callback endpoint to update extraction result status
         if callback_url and extraction_result_id:
@@ -111,7 +139,8 @@ async def img_ocr(
                 ocr_result_path = str(output_path.relative_to(project_root)).replace("\\", "/")
                 if ocr_result_path.startswith("server/"):
                     ocr_result_path = ocr_result_path[len("server/"):]
-                callback_response = requests.post(
+                callback_response = await asyncio.to_thread(
+                    callback_session.post,
                     callback_url,
                     json={
                         "extraction_result_id": extraction_result_id,
@@ -144,7 +173,8 @@ async def img_ocr(
         # Call callback endpoint to update extraction result status to failed
         if callback_url and extraction_result_id:
             try:
-                callback_response = requests.post(
+                callback_response = await asyncio.to_thread(
+                    callback_session.post,
                     callback_url,
                     json={
                         "extraction_result_id": extraction_result_id,
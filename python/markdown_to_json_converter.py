@@ -6,84 +6,113 @@ Handles tables, images, equations, and structured content from OCR markdown.
 import json
 import re
 import os
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 try:
     import markdown_to_json
 except ImportError:
     print("Error: markdown-to-json not installed. Run: pip install markdown-to-json")
     markdown_to_json = None
 
+try:
+    # Optional: much faster serializer for large conversion results
+    import orjson
+except ImportError:
+    orjson = None
+
+# Patterns used by the extractors, compiled once at import
+# Table and image divs: the text between <div> and <table>/<img> may not
+# cross another div tag, so a match can't swallow neighbouring divs (e.g.
+# captions) and each start position scans only up to the next div tag
+TABLE_RE = re.compile(r'<div[^>]*>[^<]*(?:<(?!/?div|table)[^<]*)*<table[^>]*>(.*?)</table>.*?</div>', re.DOTALL)
+ROW_RE = re.compile(r'<tr[^>]*>(.*?)</tr>', re.DOTALL)
+CELL_RE = re.compile(r'<td[^>]*>(.*?)</td>', re.DOTALL)
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+IMAGE_RE = re.compile(r'<div[^>]*>[^<]*(?:<(?!/?div|img)[^<]*)*<img[^>]*src=["\']([^"\']+)["\'][^>]*>.*?</div>', re.DOTALL)
+ALT_RE = re.compile(r'alt=["\']([^"\']+)["\']')
+WIDTH_RE = re.compile(r'width=["\']([^"\']+)["\']')
+# LaTeX equations ($$...$$ or $...$)
+EQUATION_RE = re.compile(r'\$\$([^$]+)\$\$|\$([^$]+)\$')
+# A header line, matched in place on the whole text: same as testing each
+# stripped line against ^(#+)\s+(.+)$
+HEADER_RE = re.compile(r'^[^\S\n]*(#+)[^\S\n]+(\S[^\n]*)', re.MULTILINE)
 
-def extract_html_tables(markdown_text: str) -> List[Dict[str, Any]]:
+
+def extract_html_tables(markdown_text: str, include_html: bool = False) -> List[Dict[str, Any]]:
     """
     Extract HTML tables from markdown and convert to structured format.
+    Each table keeps its (start, end) span in markdown_text rather than a copy
+    of its HTML; pass include_html=True to also get the HTML.
     """
     tables = []
-    # Pattern to match HTML table divs
-    table_pattern = r'<div[^>]*>.*?<table[^>]*>(.*?)</table>.*?</div>'
-    
-    matches = re.finditer(table_pattern, markdown_text, re.DOTALL)
+    # Most OCR pages have no tables; skip the regex scan for them
+    if '<table' not in markdown_text:
+        return tables
+    matches = TABLE_RE.finditer(markdown_text)
     for match in matches:
-        table_html = match.group(0)
         table_content = match.group(1)
         
         # Extract table rows
         rows = []
-        row_pattern = r'<tr[^>]*>(.*?)</tr>'
-        row_matches = re.finditer(row_pattern, table_content, re.DOTALL)
+        row_matches = ROW_RE.finditer(table_content)
         
         for row_match in row_matches:
             row_html = row_match.group(1)
             # Extract cells
             cells = []
-            cell_pattern = r'<td[^>]*>(.*?)</td>'
-            cell_matches = re.finditer(cell_pattern, row_html, re.DOTALL)
+            cell_matches = CELL_RE.finditer(row_html)
             
             for cell_match in cell_matches:
                 cell_content = cell_match.group(1).strip()
                 # Remove HTML tags from cell content
-                cell_text = re.sub(r'<[^>]+>', '', cell_content)
+                cell_text = HTML_TAG_RE.sub('', cell_content)
                 cells.append(cell_text)
             
             if cells:
                 rows.append(cells)
         
         if rows:
-            tables.append({
+            table = {
                 'type': 'table',
-                'html': table_html,
+                'span': match.span(),
                 'rows': rows,
                 'row_count': len(rows),
                 'column_count': len(rows[0]) if rows else 0
-            })
+            }
+            if include_html:
+                table['html'] = match.group(0)
+            tables.append(table)
     
     return tables
 
 
-def extract_images(markdown_text: str) -> List[Dict[str, Any]]:
+def extract_images(markdown_text: str, include_html: bool = False) -> List[Dict[str, Any]]:
     """
     Extract image references from markdown.
+    Like tables, each image keeps its span; include_html=True adds the HTML.
     """
     images = []
-    # Pattern to match image divs
-    img_pattern = r'<div[^>]*>.*?<img[^>]*src=["\']([^"\']+)["\'][^>]*>.*?</div>'
-    
-    matches = re.finditer(img_pattern, markdown_text, re.DOTALL)
+    if '<img' not in markdown_text:
+        return images
+    matches = IMAGE_RE.finditer(markdown_text)
     for match in matches:
         img_src = match.group(1)
-        full_match = match.group(0)
+        start, end = match.span()
         
         # Extract alt text and other attributes
-        alt_match = re.search(r'alt=["\']([^"\']+)["\']', full_match)
-        width_match = re.search(r'width=["\']([^"\']+)["\']', full_match)
+        alt_match = ALT_RE.search(markdown_text, start, end)
+        width_match = WIDTH_RE.search(markdown_text, start, end)
         
-        images.append({
+        image = {
             'type': 'image',
             'src': img_src,
             'alt': alt_match.group(1) if alt_match else '',
             'width': width_match.group(1) if width_match else '',
-            'html': full_match
-        })
+            'span': (start, end)
+        }
+        if include_html:
+            image['html'] = match.group(0)
+        images.append(image)
     
     return images
 
@@ -93,215 +122,241 @@ def extract_equations(markdown_text: str) -> List[Dict[str, Any]]:
     Extract LaTeX equations from markdown.
     """
     equations = []
-    # Pattern to match LaTeX equations ($$...$$ or $...$)
-    equation_pattern = r'\$\$([^$]+)\$\$|\$([^$]+)\$'
-    
-    matches = re.finditer(equation_pattern, markdown_text)
+    if '$' not in markdown_text:
+        return equations
+    matches = EQUATION_RE.finditer(markdown_text)
     for match in matches:
         equation = match.group(1) or match.group(2)
         equations.append({
             'type': 'equation',
             'latex': equation.strip(),
-            'full_match': match.group(0)
+            'span': match.span()
         })
     
     return equations
 
 
-def extract_sections(markdown_text: str) -> List[Dict[str, Any]]:
+def split_by_headers(markdown_text: str) -> List[Tuple[int, str, str]]:
+    """
+    Split markdown into (level, title, body) per header, where body is the raw
+    text from the end of the header line to the next header.
+    """
+    headers = list(HEADER_RE.finditer(markdown_text))
+    bounds = [header_match.start() for header_match in headers[1:]] + [len(markdown_text)]
+    return [
+        (len(header_match.group(1)), header_match.group(2).strip(), markdown_text[header_match.end():end])
+        for header_match, end in zip(headers, bounds)
+    ]
+
+
+def non_blank_lines(text: str) -> str:
+    """Text with blank lines removed and outer whitespace stripped"""
+    return '\n'.join(line for line in text.split('\n') if line.strip()).strip()
+
+
+def extract_sections(markdown_text: str,
+                     header_sections: Optional[List[Tuple[int, str, str]]] = None) -> List[Dict[str, Any]]:
     """
     Extract sections based on markdown headers.
+    header_sections is split_by_headers(markdown_text), if already computed.
     """
-    sections = []
-    lines = markdown_text.split('\n')
-    current_section = None
-    current_content = []
-    
-    for line in lines:
-        # Check if line is a header
-        header_match = re.match(r'^(#+)\s+(.+)$', line.strip())
-        if header_match:
-            # Save previous section
-            if current_section:
-                current_section['content'] = '\n'.join(current_content).strip()
-                sections.append(current_section)
-            
-            # Start new section
-            level = len(header_match.group(1))
-            title = header_match.group(2).strip()
-            current_section = {
-                'type': 'section',
-                'level': level,
-                'title': title,
-                'content': ''
-            }
-            current_content = []
-        else:
-            if current_section:
-                current_content.append(line)
-            else:
-                # Content before first header
-                if line.strip():
-                    current_content.append(line)
-    
-    # Save last section
-    if current_section:
-        current_section['content'] = '\n'.join(current_content).strip()
-        sections.append(current_section)
-    elif current_content:
-        # No headers, just content
-        sections.append({
+    if header_sections is None:
+        header_sections = split_by_headers(markdown_text)
+    
+    sections = [
+        {
             'type': 'section',
-            'level': 0,
-            'title': 'Content',
-            'content': '\n'.join(current_content).strip()
-        })
+            'level': level,
+            'title': title,
+            'content': body.strip()
+        }
+        for level, title, body in header_sections
+    ]
+    
+    if not sections:
+        # No headers, just content
+        content = non_blank_lines(markdown_text)
+        if content:
+            sections.append({
+                'type': 'section',
+                'level': 0,
+                'title': 'Content',
+                'content': content
+            })
     
     return sections
 
 
-def convert_markdown_to_json(markdown_text: str, use_markdown_to_json_lib: bool = True) -> Dict[str, Any]:
+def convert_markdown_to_json(markdown_text: str, use_markdown_to_json_lib: bool = True,
+                             include_raw: bool = False) -> Dict[str, Any]:
     """
     Convert PPStructureV3 markdown output to structured JSON.
     
     Args:
         markdown_text: Markdown text from PPStructureV3
         use_markdown_to_json_lib: Whether to use markdown-to-json library for basic conversion
+        include_raw: Whether to embed the input as 'raw_markdown'
     
     Returns:
         Dictionary with structured JSON representation
     """
-    result = {
-        'metadata': {
-            'source': 'PPStructureV3',
-            'total_length': len(markdown_text),
-            'line_count': len(markdown_text.split('\n'))
-        },
-        'content': {}
-    }
-    
     # Extract structured elements
     tables = extract_html_tables(markdown_text)
     images = extract_images(markdown_text)
     equations = extract_equations(markdown_text)
-    sections = extract_sections(markdown_text)
-    
-    result['structured_elements'] = {
-        'tables': tables,
-        'images': images,
-        'equations': equations,
-        'sections': sections,
-        'table_count': len(tables),
-        'image_count': len(images),
-        'equation_count': len(equations),
-        'section_count': len(sections)
-    }
+    # Split once for both extract_sections and the parse_markdown_custom fallback
+    header_sections = split_by_headers(markdown_text)
+    sections = extract_sections(markdown_text, header_sections)
     
     # Use markdown-to-json library for basic conversion
     if use_markdown_to_json_lib and markdown_to_json:
         try:
-            # Clean markdown for library (remove HTML tables/images first)
-            clean_markdown = markdown_text
-            # Replace HTML tables with placeholder
-            for i, table in enumerate(tables):
-                clean_markdown = clean_markdown.replace(
-                    table['html'],
-                    f"\n[TABLE_{i}]\n",
-                    1
-                )
-            # Replace images with placeholder
-            for i, img in enumerate(images):
-                clean_markdown = clean_markdown.replace(
-                    img['html'],
-                    f"\n[IMAGE_{i}: {img.get('alt', '')}]\n",
-                    1
-                )
+            # Clean markdown for library (replace HTML tables/images with
+            # placeholders, rebuilding the text once from the match spans)
+            edits = [
+                (table['span'][0], False, table['span'][1], f"\n[TABLE_{i}]\n")
+                for i, table in enumerate(tables)
+            ]
+            edits.extend(
+                (img['span'][0], True, img['span'][1], f"\n[IMAGE_{i}: {img.get('alt', '')}]\n")
+                for i, img in enumerate(images)
+            )
+            clean_markdown = splice_placeholders(markdown_text, edits)
             
             # Convert using library
-            dictified = markdown_to_json.dictify(clean_markdown)
-            result['content'] = dictified
+            content = markdown_to_json.dictify(clean_markdown)
             
             # Replace placeholders with actual table/image data
-            if isinstance(result['content'], dict):
-                for key, value in result['content'].items():
+            if isinstance(content, dict) and (tables or images):
+                elements = {f"[TABLE_{i}]": table for i, table in enumerate(tables)}
+                elements.update(
+                    (f"[IMAGE_{i}: {img.get('alt', '')}]", img) for i, img in enumerate(images)
+                )
+                placeholder_re = re.compile(
+                    '|'.join(map(re.escape, sorted(elements, key=len, reverse=True)))
+                )
+                # Serialize each element once, however many values mention it
+                serialized = {}
+                
+                def replace_placeholder(match):
+                    placeholder = match.group(0)
+                    if placeholder not in serialized:
+                        serialized[placeholder] = json.dumps(elements[placeholder], indent=2)
+                    return serialized[placeholder]
+                
+                for key, value in content.items():
                     if isinstance(value, str):
-                        # Replace table placeholders
-                        for i, table in enumerate(tables):
-                            placeholder = f"[TABLE_{i}]"
-                            if placeholder in value:
-                                result['content'][key] = value.replace(
-                                    placeholder,
-                                    json.dumps(table, indent=2)
-                                )
-                        # Replace image placeholders
-                        for i, img in enumerate(images):
-                            placeholder = f"[IMAGE_{i}:"
-                            if placeholder in value:
-                                result['content'][key] = value.replace(
-                                    f"[IMAGE_{i}: {img.get('alt', '')}]",
-                                    json.dumps(img, indent=2)
-                                )
+                        content[key] = placeholder_re.sub(replace_placeholder, value)
         except Exception as e:
             print(f"Warning: markdown-to-json library conversion failed: {e}")
             print("Falling back to custom parsing...")
-            result['content'] = parse_markdown_custom(markdown_text)
+            content = parse_markdown_custom(markdown_text, header_sections)
     else:
-        result['content'] = parse_markdown_custom(markdown_text)
+        content = parse_markdown_custom(markdown_text, header_sections)
     
-    # Add raw markdown
-    result['raw_markdown'] = markdown_text
+    # Build the result once, in the output key order
+    result = {
+        'metadata': {
+            'source': 'PPStructureV3',
+            'total_length': len(markdown_text),
+            'line_count': markdown_text.count('\n') + 1
+        },
+        'content': content,
+        'structured_elements': {
+            'tables': tables,
+            'images': images,
+            'equations': equations,
+            'sections': sections,
+            'table_count': len(tables),
+            'image_count': len(images),
+            'equation_count': len(equations),
+            'section_count': len(sections)
+        }
+    }
+    if include_raw:
+        result['raw_markdown'] = markdown_text
     
     return result
 
 
-def parse_markdown_custom(markdown_text: str) -> Dict[str, Any]:
+def splice_placeholders(markdown_text: str, edits: List[Tuple[int, bool, int, str]]) -> str:
+    """
+    Replace spans of markdown_text in a single pass.
+    
+    edits are (start, is_image, end, placeholder). A table wins over any image
+    it overlaps (possible with unclosed divs), and an overlapped image is
+    left out, as it would be once the table text is gone.
+    """
+    kept = []
+    for start, is_image, end, placeholder in sorted(edits):
+        if is_image:
+            if kept and start < kept[-1][1]:
+                continue
+        else:
+            # Tables never overlap each other, only images can be dropped here
+            while kept and start < kept[-1][1]:
+                kept.pop()
+        kept.append((start, end, placeholder))
+    
+    pieces = []
+    position = 0
+    for start, end, placeholder in kept:
+        pieces.append(markdown_text[position:start])
+        pieces.append(placeholder)
+        position = end
+    pieces.append(markdown_text[position:])
+    return ''.join(pieces)
+
+
+def parse_markdown_custom(markdown_text: str,
+                          header_sections: Optional[List[Tuple[int, str, str]]] = None) -> Dict[str, Any]:
     """
     Custom markdown parser as fallback.
+    header_sections is split_by_headers(markdown_text), if already computed.
     """
     content = {}
-    lines = markdown_text.split('\n')
-    current_key = None
-    current_content = []
-    
-    for line in lines:
-        # Check for headers
-        header_match = re.match(r'^(#+)\s+(.+)$', line.strip())
-        if header_match:
-            # Save previous section
-            if current_key:
-                content[current_key] = '\n'.join(current_content).strip()
-            
-            # Start new section
-            title = header_match.group(2).strip()
-            current_key = title
-            current_content = []
-        else:
-            if line.strip():
-                current_content.append(line)
+    if header_sections is None:
+        header_sections = split_by_headers(markdown_text)
+    
+    for _, title, body in header_sections:
+        content[title] = non_blank_lines(body)
     
-    # Save last section
-    if current_key:
-        content[current_key] = '\n'.join(current_content).strip()
-    elif current_content:
-        content['Content'] = '\n'.join(current_content).strip()
+    if not header_sections:
+        text = non_blank_lines(markdown_text)
+        if text:
+            content['Content'] = text
     
     return content
 
 
-def convert_file_to_json(markdown_file: str, output_file: Optional[str] = None) -> Dict[str, Any]:
+def dump_json_bytes(json_data: Dict[str, Any]) -> bytes:
+    """
+    Serialize to UTF-8 JSON with 2-space indent, using orjson when installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(json_data, option=orjson.OPT_INDENT_2)
+    return json.dumps(json_data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def convert_file_to_json(markdown_file: str, output_file: Optional[str] = None,
+                         include_raw: bool = False) -> Dict[str, Any]:
     """
     Convert a markdown file to JSON file.
     
     Args:
         markdown_file: Path to input markdown file
         output_file: Path to output JSON file (optional)
+        include_raw: Whether to embed the markdown as 'raw_markdown'
     
     Returns:
         Dictionary with JSON structure
     """
     try:
-        with open(markdown_file, 'r', encoding='utf-8') as f:
-            markdown_text = f.read()
+        # One binary read and decode; only translate newlines if there are any \r
+        with open(markdown_file, 'rb') as f:
+            markdown_text = f.read().decode('utf-8')
+        if '\r' in markdown_text:
+            markdown_text = markdown_text.replace('\r\n', '\n').replace('\r', '\n')
     except FileNotFoundError:
         print(f"Error: File '{markdown_file}' not found.")
         return {}
@@ -310,7 +365,7 @@ def convert_file_to_json(markdown_file: str, output_file: Optional[str] = None)
         return {}
     
     # Convert to JSON
-    json_data = convert_markdown_to_json(markdown_text)
+    json_data = convert_markdown_to_json(markdown_text, include_raw=include_raw)
     
     # Save to file if output path provided
     if output_file:
@@ -320,8 +375,8 @@ def convert_file_to_json(markdown_file: str, output_file: Optional[str] = None)
             if output_dir and not os.path.exists(output_dir):
                 os.makedirs(output_dir, exist_ok=True)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            with open(output_file, 'wb') as f:
+                f.write(dump_json_bytes(json_data))
             print(f"JSON saved to: {output_file}")
         except Exception as e:
             print(f"Error saving JSON file: {e}")
@@ -329,6 +384,37 @@ def convert_file_to_json(markdown_file: str, output_file: Optional[str] = None)
     return json_data
 
 
+def _convert_file_to_json_in(args: Tuple[str, Optional[str], bool]) -> Dict[str, Any]:
+    """convert_file_to_json for a (markdown_file, output_file, include_raw) tuple, for ProcessPoolExecutor.map"""
+    return convert_file_to_json(*args)
+
+
+def convert_files_to_json(markdown_files: List[str], output_dir: Optional[str] = None,
+                          workers: Optional[int] = None, include_raw: bool = False) -> List[Dict[str, Any]]:
+    """
+    Convert many markdown files to JSON in parallel, one process per CPU by default.
+    
+    Args:
+        markdown_files: Paths to input markdown files
+        output_dir: Directory for the JSON files, named after each input (optional)
+        workers: Number of worker processes (defaults to the CPU count)
+        include_raw: Whether to embed each markdown as 'raw_markdown'
+    
+    Returns:
+        List of JSON structures, in the same order as markdown_files
+    """
+    jobs = [
+        (markdown_file, os.path.join(output_dir, os.path.splitext(os.path.basename(markdown_file))[0] + '.json')
+         if output_dir else None, include_raw)
+        for markdown_file in markdown_files
+    ]
+    if len(jobs) < 2 or workers == 1:
+        return [_convert_file_to_json_in(job) for job in jobs]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_convert_file_to_json_in, jobs))
+
+
 def print_json_summary(json_data: Dict[str, Any]):
     """
     Print a summary of the JSON structure.
@@ -381,8 +467,13 @@ if __name__ == "__main__":
     if json_data:
         print_json_summary(json_data)
         
-        # Print JSON structure (first level)
+        # Print JSON structure (first level), summarizing nested values
+        # instead of serializing the whole document
         print("\nJSON Structure Preview:")
-        print(json.dumps(json_data, indent=2, ensure_ascii=False)[:1000] + "...")
+        preview = {
+            key: f"<{type(value).__name__} len={len(value)}>" if isinstance(value, (dict, list)) else value
+            for key, value in json_data.items()
+        }
+        print(json.dumps(preview, indent=2, ensure_ascii=False)[:1000] + "...")
     else:
         print("Conversion failed.")
@@ -1,20 +1,56 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse, JSONResponse, ORJSONResponse
 import tempfile
 import shutil
 import os
 import re
 import uuid
+import hashlib
+import importlib.metadata
 import threading
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import Dict, Optional, List
+
+# Split the CPU threads of OpenMP/MKL/OpenBLAS between the pipelines that can
+# run at once (OCR_POOL_SIZE), so concurrent jobs don't oversubscribe the
+# cores. Has to happen before paddle is imported; explicit settings win
+OCR_THREADS_PER_PIPELINE = max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("OCR_POOL_SIZE", "1"))))
+for thread_var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(thread_var, str(OCR_THREADS_PER_PIPELINE))
+
 from paddleocr import PPStructureV3
 from pathlib import Path
 import sys
 import io
 import json
 
+try:
+    # orjson serializes large PPStructureV3 results several times faster
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    # BLAKE3 hashes large images several times faster than SHA-256 (multi-threaded, SIMD)
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
 # Set stdout encoding to UTF-8 for Windows console
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -28,28 +64,166 @@ def safe_print(message: str):
         ascii_message = message.encode('ascii', 'replace').decode('ascii')
         print(f"[ASCII-ONLY] {ascii_message}")
 
-# Initialize PPStructureV3 pipeline with error handling
-pipeline = None
-try:
-    safe_print("[INIT] Initializing PaddleOCR PPStructureV3...")
-    pipeline = PPStructureV3()
-    safe_print("[OK] PaddleOCR initialized successfully")
-except Exception as e:
-    safe_print(f"[ERROR] Failed to initialize PaddleOCR: {e}")
-    import traceback
-    safe_print(f"[ERROR] Traceback:\n{traceback.format_exc()}")
-    safe_print("[ERROR] OCR API will start but will fail on requests until PaddleOCR is fixed")
-    # Don't raise - let the app start so we can see health check errors
+def pipeline_options() -> Dict:
+    """
+    PPStructureV3 options from the environment (all optional):
+    OCR_ENABLE_HPI=1 for high-performance inference (automatic TensorRT/OpenVINO/ONNX Runtime backend),
+    OCR_BACKEND=tensorrt to use TensorRT, OCR_PRECISION (e.g. fp16),
+    OCR_MODE=cpu-low-mem to recognize text one line at a time (lower peak memory on CPU)
+    """
+    options = {}
+    if os.getenv("OCR_ENABLE_HPI", "").lower() in ("1", "true", "yes"):
+        options["enable_hpi"] = True
+    if os.getenv("OCR_BACKEND", "").lower() == "tensorrt":
+        options["use_tensorrt"] = True
+    if os.getenv("OCR_PRECISION"):
+        options["precision"] = os.getenv("OCR_PRECISION")
+    if os.getenv("OCR_MODE", "").lower() == "cpu-low-mem":
+        options["text_recognition_batch_size"] = 1
+    return options
+
+def create_pipeline():
+    """
+    Create a PPStructureV3 pipeline with the options from the environment
+    Falls back to the default Paddle Inference backend (with MKL-DNN) if
+    high-performance inference can't be set up on this machine
+    """
+    options = pipeline_options()
+    if options.get("enable_hpi") or options.get("use_tensorrt"):
+        try:
+            return PPStructureV3(**options)
+        except Exception as e:
+            safe_print(f"[WARNING] High-performance inference unavailable ({e}), using the default backend")
+            options = {key: value for key, value in options.items() if key not in ("enable_hpi", "use_tensorrt", "precision")}
+            options["enable_mkldnn"] = True
+    return PPStructureV3(**options)
+
+# Number of PPStructureV3 instances, and so of OCR jobs that can run at once
+# (each instance holds its own copy of the models)
+OCR_POOL_SIZE = max(1, int(os.getenv("OCR_POOL_SIZE", "1")))
+
+# Pool of PPStructureV3 pipelines (PPStructureV3 is not thread-safe, so each
+# instance is used by one thread at a time). Pipelines are created on first
+# use, so starting the API (or a worker that never runs OCR) doesn't load the models
+pipeline_pool = queue.Queue()
+pipeline_count = 0  # Pipelines created so far (in the pool or in use)
+pipeline_lock = threading.Lock()
+pipeline_init_error: Optional[str] = None  # Last initialization failure, for /health
+
+def acquire_pipeline():
+    """
+    Take a free pipeline from the pool, creating a new one if all are in use
+    and fewer than OCR_POOL_SIZE exist; otherwise wait for one to be returned
+    The caller must put it back in pipeline_pool when done
+    """
+    global pipeline_count, pipeline_init_error
+    while True:
+        try:
+            return pipeline_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with pipeline_lock:
+            create = pipeline_count < OCR_POOL_SIZE
+            if create:
+                pipeline_count += 1
+                instance_number = pipeline_count
+        if create:
+            break
+        try:
+            return pipeline_pool.get(timeout=1)
+        except queue.Empty:
+            continue  # Check again in case a pipeline failed to initialize
+    
+    try:
+        safe_print(f"[INIT] Initializing PaddleOCR PPStructureV3 (instance {instance_number}/{OCR_POOL_SIZE})...")
+        pipeline = create_pipeline()
+        safe_print("[OK] PaddleOCR initialized successfully")
+        pipeline_init_error = None
+        return pipeline
+    except Exception as e:
+        with pipeline_lock:
+            pipeline_count -= 1
+        pipeline_init_error = str(e)
+        safe_print(f"[ERROR] Failed to initialize PaddleOCR: {e}")
+        import traceback
+        safe_print(f"[ERROR] Traceback:\n{traceback.format_exc()}")
+        raise Exception(f"PaddleOCR pipeline not initialized: {e}")
+
+# Shared session so callbacks and server lookups reuse keep-alive connections
+http_session = requests.Session()
+http_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+http_session.mount("http://", http_adapter)
+http_session.mount("https://", http_adapter)
 
 # Allowed image extensions
-ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'tif', 'webp'}
+ALLOWED_IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'tif', 'webp'})
+ALLOWED_IMAGE_EXTENSIONS_TEXT = ', '.join(sorted(ALLOWED_IMAGE_EXTENSIONS))
+
+# Buffer size for copying uploads to disk
+UPLOAD_COPY_BUFSIZE = 1 << 20
+# Each thread reuses one copy buffer for all the uploads it saves
+upload_copy_buffers = threading.local()
+
+# Uploads are staged as temp files named with this prefix; any left behind
+# (e.g. by a crash) are removed once they are older than TEMP_UPLOAD_MAX_AGE
+TEMP_UPLOAD_PREFIX = "ocr_upload_"
+TEMP_UPLOAD_MAX_AGE = 24 * 60 * 60  # seconds
+TEMP_UPLOAD_SWEEP_INTERVAL = 60 * 60  # seconds
+
+# Cache of OCR results by image content (see image_cache_key), so resubmitted pages skip the
+# pipeline; least recently used entries are dropped past OCR_CACHE_MAX_ENTRIES
+# (0 disables the cache)
+OCR_CACHE_DIR = Path(os.getenv("OCR_CACHE_DIR") or Path(__file__).parent.resolve() / ".ocr_cache")
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "1000"))
+# Bump when the post-processing of OCR output (e.g. fix_title_spacing) changes,
+# so results cached by older code are not reused
+OCR_CACHE_VERSION = 1
 
-# Job storage (in-memory, for production consider Redis or database)
+# Document info fetched from the server, by document_id: (expires_at, document)
+DOCUMENT_INFO_TTL = 60  # seconds
+document_info_cache: Dict[str, tuple] = {}
+document_info_lock = threading.Lock()
+
+# Job storage: in memory by default; set OCR_REDIS_URL to keep jobs in Redis
+# instead, so they survive restarts and are shared by all uvicorn workers
 job_storage: Dict[str, Dict] = {}
 job_lock = threading.Lock()
+JOB_TTL = 24 * 60 * 60  # Seconds a job is kept in Redis
+REDIS_SOCKET_TIMEOUT = float(os.getenv("OCR_REDIS_TIMEOUT", "5"))  # seconds
+redis_client = None
+if os.getenv("OCR_REDIS_URL"):
+    if redis is None:
+        safe_print("[WARNING] OCR_REDIS_URL is set but the redis package is not installed, keeping jobs in memory")
+    else:
+        # Timeouts, so an unreachable Redis fails requests instead of hanging them
+        redis_client = redis.Redis.from_url(
+            os.getenv("OCR_REDIS_URL"),
+            decode_responses=True,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+        )
 
-# Pipeline lock for thread-safe access (PPStructureV3 is not thread-safe)
-pipeline_lock = threading.Lock()
+# Sets fields of a job hash only if it still exists, in one atomic step, so
+# an update racing a delete can't recreate the job without its TTL
+# KEYS[1]: job hash; ARGV: field, value, field, value, ...
+UPDATE_JOB_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+update_job_script = redis_client.register_script(UPDATE_JOB_SCRIPT) if redis_client is not None else None
+
+# Runs async OCR jobs, one per pipeline in the pool
+job_executor = ThreadPoolExecutor(max_workers=OCR_POOL_SIZE, thread_name_prefix="ocr-job")
+
+# Sends job callbacks, so a slow webhook doesn't hold up the next queued job
+callback_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ocr-callback")
+
+# Writes OCR result files in the background, so saving one image's results
+# doesn't hold up post-processing of the next
+writer_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ocr-writer")
 
 # Job statuses
 JOB_STATUS_PENDING = "pending"
@@ -57,245 +231,658 @@ JOB_STATUS_PROCESSING = "processing"
 JOB_STATUS_COMPLETED = "completed"
 JOB_STATUS_FAILED = "failed"
 
-def fix_spacing_errors(text: str) -> str:
+# Encoded status responses of finished jobs (which no longer change), so
+# repeated polls don't re-encode the whole text: job_id -> (expires_at, body)
+STATUS_CACHE_TTL = 3600  # seconds
+STATUS_CACHE_MAX_ENTRIES = 64
+status_response_cache: "OrderedDict[str, tuple]" = OrderedDict()
+status_cache_lock = threading.Lock()
+# Clients must not cache statuses: a deleted job has to stop being served
+STATUS_RESPONSE_HEADERS = {"Cache-Control": "no-store"}
+
+# Open /imgOcr/events streams waiting for a job's status to change:
+# job_id -> [(event loop, asyncio.Event)]
+job_listeners: Dict[str, List] = {}
+job_listeners_lock = threading.Lock()
+# How often event streams re-read the job anyway (with Redis, the job may be
+# updated by another worker, which can't notify this one's listeners)
+JOB_EVENTS_POLL_INTERVAL = 2  # seconds
+
+def notify_job_listeners(job_id: str):
+    """Wake the event streams of a job (safe to call from any thread)"""
+    with job_listeners_lock:
+        listeners = list(job_listeners.get(job_id, ()))
+    for loop, event in listeners:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+def job_key(job_id: str) -> str:
+    """Redis hash holding a job's fields (each value JSON-encoded)"""
+    return f"ocr:job:{job_id}"
+
+def create_job(job_id: str, job: Dict):
+    """Store a new job"""
+    if redis_client is not None:
+        key = job_key(job_id)
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={field: json.dumps(value) for field, value in job.items()})
+        pipe.expire(key, JOB_TTL)
+        pipe.execute()
+        return
+    with job_lock:
+        job_storage[job_id] = job
+
+def get_job(job_id: str) -> Optional[Dict]:
     """
-    Fix spacing errors in OCR text, especially in titles
-    Examples: "I ntroduction" -> "Introduction", "I llustration" -> "Illustration"
+    Return a copy of a job's fields, or None if there is no such job
+    The copy is taken under job_lock (or in one HGETALL), so it never
+    reflects a half-applied update
     """
-    if not text:
-        return text
-    
-    # Fix: single capital letter followed by space and lowercase letter (common OCR error in titles)
-    # Pattern: "I ntroduction" -> "Introduction", "A bstract" -> "Abstract", "I llustration" -> "Illustration"
-    text = re.sub(r'\b([A-Z])\s+([a-z])', r'\1\2', text)
-    
-    # Fix: lowercase letter followed by space and capital letter (word boundary)
-    # text = re.sub(r'([a-z])\s+([A-Z])', r'\1 \2', text)
-    
-    # Fix: common word concatenations
-    # "ofyour" -> "of your", "inthe" -> "in the", "tothe" -> "to the"
-    # common_words = ['of', 'in', 'to', 'the', 'and', 'or', 'is', 'it', 'as', 'at', 'on', 'for', 'with']
-    # for word in common_words:
-        # Pattern: letter + common word + letter (e.g., "ofyour")
-        # text = re.sub(rf'([a-z])({word})([a-z])', rf'\1 {word} \3', text, flags=re.IGNORECASE)
-    
-    # Fix: letter/number followed by opening parenthesis
-    # text = re.sub(r'([a-zA-Z0-9])([\(\[\{])', r'\1 \2', text)
-    
-    # Fix: closing parenthesis followed by letter/number
-    # text = re.sub(r'([\)\]\}])([a-zA-Z0-9])', r'\1 \2', text)
-    
-    # Fix: number followed by letter
-    # text = re.sub(r'(\d)([a-zA-Z])', r'\1 \2', text)
-    
-    # Fix: multiple spaces to single space
-    # text = re.sub(r'\s+', ' ', text)
-    
-    # Fix: spaces before punctuation
-    # text = re.sub(r'\s+([,\.;:!?])', r'\1', text)
-    
-    # Fix: spaces after punctuation
-    # text = re.sub(r'([,\.;:!?])\s*([a-zA-Z])', r'\1 \2', text)
-    
-    # Fix: remove spaces before closing quotes/parentheses
-    # text = re.sub(r'\s+([\)\]\}])', r'\1', text)
-    # text = re.sub(r'([\(\[\{])\s+', r'\1', text)
-    
-    return text.strip()
+    if redis_client is not None:
+        fields = redis_client.hgetall(job_key(job_id))
+        return {field: json.loads(value) for field, value in fields.items()} or None
+    with job_lock:
+        job = job_storage.get(job_id)
+        return dict(job) if job else None
+
+def job_exists(job_id: str) -> bool:
+    """Whether a job is still in storage, without reading its fields"""
+    if redis_client is not None:
+        return bool(redis_client.exists(job_key(job_id)))
+    with job_lock:
+        return job_id in job_storage
+
+def update_job(job_id: str, **fields) -> bool:
+    """
+    Set several fields of a job in one step under job_lock (or in one
+    atomic check-and-HSET script)
+    Returns False if the job no longer exists
+    """
+    if redis_client is not None:
+        args = [item for field, value in fields.items() for item in (field, json.dumps(value))]
+        if not update_job_script(keys=[job_key(job_id)], args=args):
+            return False
+    else:
+        with job_lock:
+            job = job_storage.get(job_id)
+            if job is None:
+                return False
+            job.update(fields)
+    if "status" in fields:
+        notify_job_listeners(job_id)
+    return True
+
+def delete_job_entry(job_id: str):
+    """Remove a job from storage"""
+    with status_cache_lock:
+        status_response_cache.pop(job_id, None)
+    if redis_client is not None:
+        redis_client.delete(job_key(job_id))
+        return
+    with job_lock:
+        job_storage.pop(job_id, None)
+
+# Spacing fix pattern, compiled once at import: a single capital letter at
+# the start of a word, followed by spaces (not crossing a line break) and a
+# lowercase letter. Starting on the capital (the lookbehind is the \b) lets
+# re skip quickly to candidate positions
+DOC_CAPITAL_SPACE_RE = re.compile(r'([A-Z])(?<!\w[A-Z])[^\S\n]+([a-z])')
 
 def fix_title_spacing(markdown_text: str) -> str:
     """
-    Fix spacing errors in markdown, especially in headers/titles
-    """
-    lines = markdown_text.split('\n')
-    fixed_lines = []
-    
-    for line in lines:
-        # Fix spacing in headers (lines starting with #)
-        if line.strip().startswith('#'):
-            # Extract header level and content
-            header_match = re.match(r'^(#+\s*)(.*)', line)
-            if header_match:
-                header_prefix = header_match.group(1)
-                header_content = header_match.group(2)
-                fixed_content = fix_spacing_errors(header_content)
-                fixed_lines.append(header_prefix + fixed_content)
-            else:
-                fixed_lines.append(fix_spacing_errors(line))
-        else:
-            fixed_lines.append(fix_spacing_errors(line))
-    
-    return '\n'.join(fixed_lines)
+    Fix spacing errors in markdown, especially in headers/titles: a single
+    capital letter split from the rest of its word is joined back
+    ("I ntroduction" -> "Introduction", "A bstract" -> "Abstract"), in one
+    regex pass over the text. Lines are stripped, except those that are only
+    a header prefix like "## "
+    """
+    lines = DOC_CAPITAL_SPACE_RE.sub(r'\1\2', markdown_text).split('\n')
+    return '\n'.join([
+        line if line[:1] == '#' and not line.lstrip('#').strip() else line.strip()
+        for line in lines
+    ])
 
-def ocr_single_image(image_path: str, groupname: Optional[str] = None, name: Optional[str] = None) -> str:
+def predict_with_retry(inputs, on_result=None):
     """
-    Process a single image with PPStructureV3 and return markdown
-    If groupname and name are provided, saves markdown to server/uploads/ocr-results/{groupname}/{name}.md
-    and JSON to server/uploads/ocr-results/{groupname}/{name}.json
-    Otherwise, uses a temporary directory
+    Run predict on inputs (a path or list of paths) with a pipeline from the
+    pool, reinitializing that pipeline and retrying on PreconditionNotMetError-style failures
+    If on_result is given, results are streamed to it as the pipeline produces
+    them instead of returned (a failure after the first result is not retried)
     """
-    global pipeline  # Declare global at the top of the function
-    
-    if pipeline is None:
-        raise Exception("PaddleOCR pipeline not initialized. Check OCR API logs for initialization errors.")
+    # Take a pipeline from the pool (waiting for one to be free) for the whole call
+    # Also implement retry logic for PreconditionNotMetError
+    pipeline = acquire_pipeline()
+    max_retries = 2
+    retry_count = 0
+    output = None
+    delivered = False
     
     try:
-        # PPStructureV3 is not thread-safe, so we need to serialize access
-        # Also implement retry logic for PreconditionNotMetError
-        max_retries = 2
-        retry_count = 0
-        output = None
-        
         while retry_count <= max_retries:
             try:
-                with pipeline_lock:
-                    output = pipeline.predict(image_path)
+                if on_result is None:
+                    output = pipeline.predict(inputs)
+                else:
+                    for res in pipeline.predict_iter(inputs):
+                        delivered = True
+                        on_result(res)
                 break  # Success, exit retry loop
             except RuntimeError as e:
                 error_str = str(e)
-                if ("Tensor holds no memory" in error_str or 
+                if not delivered and ("Tensor holds no memory" in error_str or 
                     "PreconditionNotMetError" in error_str or
                     "PreconditionNotMet" in error_str):
                     retry_count += 1
                     if retry_count <= max_retries:
                         safe_print(f"[WARNING] Pipeline error (attempt {retry_count}/{max_retries}): {error_str}")
                         safe_print(f"[WARNING] Reinitializing pipeline and retrying...")
-                        # Reinitialize pipeline within lock
-                        with pipeline_lock:
-                            try:
-                                pipeline = PPStructureV3()
-                                safe_print(f"[OK] Pipeline reinitialized successfully")
-                            except Exception as init_error:
-                                safe_print(f"[ERROR] Failed to reinitialize pipeline: {init_error}")
-                                raise Exception(f"Failed to reinitialize pipeline after error: {init_error}")
+                        # Reinitialize only this pipeline; it replaces the old one in the pool
+                        try:
+                            pipeline = create_pipeline()
+                            safe_print(f"[OK] Pipeline reinitialized successfully")
+                        except Exception as init_error:
+                            safe_print(f"[ERROR] Failed to reinitialize pipeline: {init_error}")
+                            raise Exception(f"Failed to reinitialize pipeline after error: {init_error}")
                     else:
                         raise Exception(f"Pipeline failed after {max_retries} retries: {error_str}")
                 else:
                     # Not a PreconditionNotMetError, re-raise immediately
                     raise
+    finally:
+        pipeline_pool.put(pipeline)
 
-        markdown_blocks = []
+    return output
 
-        # Determine save directory
+def ocr_results_dir(groupname: str) -> Path:
+    """Directory the OCR results of a group are saved to"""
+    # Path relative to python/ directory: go up one level, then into server/uploads/ocr-results
+    script_dir = Path(__file__).parent.resolve()  # python/ directory
+    project_root = script_dir.parent  # project root
+    return project_root / "server" / "uploads" / "ocr-results" / groupname
+
+def atomic_write(path: Path, data):
+    """
+    Write text or bytes to path through a temporary file in the same
+    directory, so readers never see a partially written file
+    """
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if isinstance(data, bytes):
+            tmp_path.write_bytes(data)
+        else:
+            tmp_path.write_text(data, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def save_ocr_files(save_dir: Path, name: str, markdown_text: Optional[str], markdown_images: Dict, json_data_list: List):
+    """
+    Write {name}.md (unless markdown_text is None) with the images it
+    references, and {name}.json, to save_dir
+    """
+    save_dir.mkdir(parents=True, exist_ok=True)
+    
+    if markdown_text is not None:
+        atomic_write(save_dir / f"{name}.md", markdown_text)
+        
+        # Images referenced by the markdown, at their relative paths
+        for image_path, image in markdown_images.items():
+            file_path = save_dir / image_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            image.save(file_path)
+    
+    if json_data_list:
+        # Combine JSON data
+        if len(json_data_list) == 1:
+            combined_json = json_data_list[0]
+        else:
+            # Multiple results - save as array
+            combined_json = json_data_list
+        
+        json_path = save_dir / f"{name}.json"
+        if orjson is not None:
+            try:
+                atomic_write(json_path, orjson.dumps(
+                    combined_json,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                ))
+                return
+            except TypeError:
+                pass  # Not serializable by orjson, use json below
+        atomic_write(json_path, json.dumps(combined_json, indent=2, ensure_ascii=False))
+
+@lru_cache(maxsize=None)
+def ocr_config_fingerprint() -> bytes:
+    """
+    Everything besides the image that shapes a cached OCR result: pipeline
+    options, PaddleOCR version, inference device and OCR_CACHE_VERSION
+    """
+    try:
+        paddleocr_version = importlib.metadata.version("paddleocr")
+    except importlib.metadata.PackageNotFoundError:
+        paddleocr_version = None
+    try:
+        import paddle
+        device = paddle.device.get_device()
+    except Exception:
+        device = None
+    config = {
+        "options": pipeline_options(),
+        "paddleocr": paddleocr_version,
+        "device": device,
+        "version": OCR_CACHE_VERSION,
+    }
+    return json.dumps(config, sort_keys=True).encode("utf-8")
+
+def image_cache_key(image_path: str) -> Optional[str]:
+    """
+    Hash of the OCR configuration and the image bytes (BLAKE3 if installed,
+    else SHA-256), prefixed with the algorithm name so keys from the two
+    never mix, or None if the cache is disabled or the file can't be read
+    A configuration change gives every image a new key, so stale results
+    are never reused and age out of the cache like any unused entry
+    """
+    if OCR_CACHE_MAX_ENTRIES <= 0:
+        return None
+    try:
+        if blake3 is not None:
+            digest = blake3(ocr_config_fingerprint(), max_threads=blake3.AUTO).update_mmap(image_path).hexdigest()
+            return f"blake3-{digest}"
+        hasher = hashlib.sha256(ocr_config_fingerprint())
+        hasher.update(Path(image_path).read_bytes())
+        return f"sha256-{hasher.hexdigest()}"
+    except (OSError, ValueError):
+        return None
+
+def load_cached_ocr(cache_key: str, groupname: Optional[str] = None, name: Optional[str] = None) -> Optional[str]:
+    """
+    Return the cached markdown for an image, or None on a cache miss
+    If groupname and name are provided, also copies the cached files to where
+    collect_markdown would have saved them
+    """
+    entry_dir = OCR_CACHE_DIR / cache_key
+    try:
+        markdown_text = (entry_dir / "text.md").read_text(encoding="utf-8")
+        os.utime(entry_dir)  # Mark as recently used
+        
         if groupname and name:
-            # Save to specified directory
-            # Path relative to python/ directory: go up one level, then into server/uploads/ocr-results
-            script_dir = Path(__file__).parent.resolve()  # python/ directory
-            project_root = script_dir.parent  # project root
-            save_dir = project_root / "server" / "uploads" / "ocr-results" / groupname
-            save_dir.mkdir(parents=True, exist_ok=True)
+            save_dir = ocr_results_dir(groupname)
+            for file_path in entry_dir.rglob("*"):
+                if not file_path.is_file() or file_path.name == "text.md":
+                    continue
+                relative_path = file_path.relative_to(entry_dir)
+                if len(relative_path.parts) == 1 and relative_path.stem == "page":
+                    target_path = save_dir / f"{name}{relative_path.suffix}"
+                else:
+                    target_path = save_dir / relative_path
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(file_path, target_path)
+            safe_print(f"[SAVE] Saved cached OCR results to: {save_dir}")
+    except OSError:
+        return None
+    
+    safe_print(f"[CACHE] Reusing OCR result for image {cache_key[:19]}")
+    return markdown_text
+
+def store_cached_ocr(cache_key: str, markdown_text: str, has_markdown: bool, markdown_images: Dict, json_data_list: List):
+    """
+    Add an image's OCR results to the cache; the entry is written to a temporary
+    directory and renamed into place so readers never see a partial entry
+    """
+    entry_dir = OCR_CACHE_DIR / cache_key
+    if entry_dir.exists():
+        return
+    
+    tmp_dir = OCR_CACHE_DIR / f".tmp-{cache_key}-{uuid.uuid4().hex}"
+    try:
+        save_ocr_files(tmp_dir, "page", markdown_text if has_markdown else None, markdown_images, json_data_list)
+        (tmp_dir / "text.md").write_text(markdown_text, encoding="utf-8")
+        os.rename(tmp_dir, entry_dir)
+    except Exception as e:
+        # Already cached by another job, or the cache dir is not writable
+        if not entry_dir.exists():
+            safe_print(f"Warning: Could not cache OCR result: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    
+    prune_ocr_cache()
+
+def prune_ocr_cache():
+    """Drop the least recently used cache entries past OCR_CACHE_MAX_ENTRIES"""
+    try:
+        entries = [entry for entry in OCR_CACHE_DIR.iterdir() if not entry.name.startswith(".")]
+        if len(entries) <= OCR_CACHE_MAX_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - OCR_CACHE_MAX_ENTRIES]:
+            shutil.rmtree(entry, ignore_errors=True)
+    except OSError as e:
+        safe_print(f"Warning: Could not prune OCR cache: {e}")
+
+def collect_markdown(output, groupname: Optional[str] = None, name: Optional[str] = None, cache_key: Optional[str] = None, pending_writes: Optional[List] = None) -> str:
+    """
+    Return the markdown for one image's PPStructureV3 results
+    If groupname and name are provided, also saves it (with its images) and the
+    JSON results (see ocr_single_image for where)
+    If cache_key is provided, the results are also added to the OCR cache
+    If pending_writes is provided, files are written on the writer threads and
+    the future is appended to it instead of waiting for the write
+    """
+    save = bool(groupname and name)
+    cache = bool(cache_key and output)
+    markdown_blocks = []
+    markdown_images = {}
+    json_data_list = []
+    
+    # Take markdown and JSON from the results in memory
+    for res in output:
+        try:
+            md_info = res.markdown
+            if md_info.get("markdown_texts"):
+                markdown_blocks.append(md_info["markdown_texts"])
+            if save or cache:
+                markdown_images.update(md_info.get("markdown_images") or {})
+        except Exception as e:
+            safe_print(f"Warning: Could not get markdown: {e}")
+        
+        if save or cache:
+            try:
+                json_data_list.extend(res.json.values())
+            except Exception as e:
+                safe_print(f"Warning: Could not get JSON: {e}")
+
+    # Combine markdown blocks
+    if markdown_blocks:
+        markdown_text = "\n\n".join(markdown_blocks)
+    else:
+        # Fallback: generate markdown from parsing results
+        markdown_text = ""
+        for res in output:
+            if hasattr(res, 'res') and 'parsing_res_list' in res.res:
+                for block in res.res['parsing_res_list']:
+                    if isinstance(block, dict):
+                        block_content = block.get('block_content', '')
+                    else:
+                        block_content = getattr(block, 'block_content', '')
+                    if block_content:
+                        markdown_text += block_content + "\n"
+    
+    # Fix spacing errors
+    markdown_text = fix_title_spacing(markdown_text)
+    
+    def write_files():
+        if save:
+            save_dir = ocr_results_dir(groupname)
             safe_print(f"[INFO] Saving markdown to: {save_dir}")
-            use_temp = False
+            save_ocr_files(save_dir, name, markdown_text if markdown_blocks else None, markdown_images, json_data_list)
+            if markdown_blocks:
+                safe_print(f"[SAVE] Saved markdown to: {save_dir / f'{name}.md'}")
+            if json_data_list:
+                safe_print(f"[SAVE] Saved JSON to: {save_dir / f'{name}.json'}")
+        
+        if cache:
+            store_cached_ocr(cache_key, markdown_text, bool(markdown_blocks), markdown_images, json_data_list)
+    
+    if save or cache:
+        if pending_writes is None:
+            write_files()
         else:
-            # Use temporary directory
-            save_dir = tempfile.mkdtemp()
-            use_temp = True
+            pending_writes.append(writer_executor.submit(write_files))
+    
+    # Warn if OCR returned very little text (might indicate failure)
+    if len(markdown_text.strip()) < 50:
+        safe_print(f"[WARNING] OCR returned minimal text ({len(markdown_text)} chars). Image might be blank or OCR failed silently.")
+
+    return markdown_text
 
+def ocr_batch_images(image_paths: List[str], groupname: Optional[str] = None, names: Optional[List[Optional[str]]] = None) -> List[str]:
+    """
+    Process images with a single PPStructureV3 predict call, so the pipeline
+    can batch them, and return the markdown for each image in order.
+    names gives the output name for each image (see ocr_single_image).
+    Images already in the OCR cache are not run through the pipeline.
+    
+    Inference runs on its own thread and streams results through a queue, so
+    each image is saved and post-processed while the next one is being OCRed.
+    Files are written on the writer threads; all writes are finished when
+    this returns.
+    """
+    return list(iter_batch_markdown(image_paths, groupname=groupname, names=names))
+
+def iter_batch_markdown(image_paths: List[str], groupname: Optional[str] = None, names: Optional[List[Optional[str]]] = None):
+    """
+    Generator version of ocr_batch_images: yields the markdown for each image,
+    in order, as soon as that image (and the ones before it) are done
+    """
+    if names is None:
+        names = [None] * len(image_paths)
+    name_by_path = dict(zip(image_paths, names))
+    cache_key_by_path = {image_path: image_cache_key(image_path) for image_path in image_paths}
+    
+    markdown_by_path = {}
+    for image_path in image_paths:
+        cache_key = cache_key_by_path[image_path]
+        if cache_key:
+            cached_markdown = load_cached_ocr(cache_key, groupname=groupname, name=name_by_path[image_path])
+            if cached_markdown is not None:
+                markdown_by_path[image_path] = cached_markdown
+    pending_paths = [image_path for image_path in image_paths if image_path not in markdown_by_path]
+    
+    results_queue = queue.Queue(maxsize=4)
+    cancelled = threading.Event()
+    pending_writes = []
+    
+    def deliver(res):
+        if cancelled.is_set():
+            raise Exception("Batch cancelled")
+        results_queue.put(res)
+    
+    def run_inference():
         try:
-            # Extract markdown and JSON from results
-            for res in output:
-                try:
-                    # Try to save markdown directly
-                    res.save_to_markdown(save_path=str(save_dir))
-                except Exception as e:
-                    safe_print(f"Warning: Could not save markdown: {e}")
-                
-                try:
-                    # Try to save JSON directly
-                    res.save_to_json(save_path=str(save_dir))
-                except Exception as e:
-                    safe_print(f"Warning: Could not save JSON: {e}")
-
-            # Read all markdown files
-            temp_md_files = []
-            for file in sorted(os.listdir(save_dir)):
-                if file.endswith(".md"):
-                    file_path = os.path.join(save_dir, file)
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        markdown_blocks.append(content)
-                        temp_md_files.append(file_path)
-            
-            # Read all JSON files
-            temp_json_files = []
-            json_data_list = []
-            for file in sorted(os.listdir(save_dir)):
-                if file.endswith(".json"):
-                    file_path = os.path.join(save_dir, file)
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        json_data = json.load(f)
-                        json_data_list.append(json_data)
-                        temp_json_files.append(file_path)
-            
-            # If saving to permanent location and we have a name, save combined markdown to desired filename
-            if not use_temp and name and markdown_blocks:
-                target_md_path = save_dir / f"{name}.md"
-                # Combine all markdown blocks
-                combined_markdown = "\n\n".join(markdown_blocks)
-                with open(target_md_path, "w", encoding="utf-8") as f:
-                    f.write(combined_markdown)
-                safe_print(f"[SAVE] Saved markdown to: {target_md_path}")
-                
-                # Clean up temporary markdown files created by PaddleOCR
-                for temp_file in temp_md_files:
-                    if temp_file != str(target_md_path) and os.path.exists(temp_file):
-                        try:
-                            os.remove(temp_file)
-                        except Exception as e:
-                            safe_print(f"[WARNING] Could not remove temp file {temp_file}: {e}")
-            
-            # If saving to permanent location and we have a name, save combined JSON to desired filename
-            if not use_temp and name and json_data_list:
-                target_json_path = save_dir / f"{name}.json"
-                # Combine JSON data
-                if len(json_data_list) == 1:
-                    combined_json = json_data_list[0]
-                else:
-                    # Multiple JSON files - save as array
-                    combined_json = json_data_list
-                
-                with open(target_json_path, "w", encoding="utf-8") as f:
-                    json.dump(combined_json, f, indent=2, ensure_ascii=False)
-                safe_print(f"[SAVE] Saved JSON to: {target_json_path}")
-                
-                # Clean up temporary JSON files created by PaddleOCR
-                for temp_file in temp_json_files:
-                    if temp_file != str(target_json_path) and os.path.exists(temp_file):
-                        try:
-                            os.remove(temp_file)
-                        except Exception as e:
-                            safe_print(f"[WARNING] Could not remove temp file {temp_file}: {e}")
+            if pending_paths:
+                predict_with_retry(pending_paths, on_result=deliver)
+        except Exception as e:
+            results_queue.put(e)
         finally:
-            # Only clean up if using temporary directory
-            if use_temp and os.path.exists(save_dir):
-                shutil.rmtree(save_dir)
+            results_queue.put(None)  # End of results
+    
+    inference_thread = threading.Thread(target=run_inference, daemon=True)
+    inference_thread.start()
+    
+    try:
+        # Results come back in input order; an image is complete once
+        # results for the next one start arriving
+        current_path = None
+        current_results = []
+        next_index = 0
+        while True:
+            # Yield the images that are done, in input order
+            while next_index < len(image_paths) and image_paths[next_index] in markdown_by_path:
+                yield markdown_by_path[image_paths[next_index]]
+                next_index += 1
+            
+            item = results_queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if item is None or item["input_path"] != current_path:
+                if current_path is not None:
+                    markdown_by_path[current_path] = collect_markdown(
+                        current_results, groupname=groupname, name=name_by_path.get(current_path),
+                        cache_key=cache_key_by_path.get(current_path), pending_writes=pending_writes
+                    )
+                if item is None:
+                    break
+                current_path = item["input_path"]
+                current_results = []
+            current_results.append(item)
+        
+        for image_path, image_name in zip(image_paths[next_index:], names[next_index:]):
+            if image_path in markdown_by_path:
+                yield markdown_by_path[image_path]
+            else:
+                yield collect_markdown([], groupname=groupname, name=image_name, pending_writes=pending_writes)
+        
+        # Wait for the files to be written (raises if a write failed)
+        for future in pending_writes:
+            future.result()
+    except Exception as e:
+        raise Exception(f"Error processing images: {str(e)}")
+    finally:
+        # Unblock and stop the inference thread if we bailed out early
+        cancelled.set()
+        while inference_thread.is_alive():
+            try:
+                results_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        # Don't leave writes running after finishing
+        wait(pending_writes)
 
-        # Combine markdown blocks
-        if markdown_blocks:
-            markdown_text = "\n\n".join(markdown_blocks)
-        else:
-            # Fallback: generate markdown from parsing results
-            markdown_text = ""
-            for res in output:
-                if hasattr(res, 'res') and 'parsing_res_list' in res.res:
-                    for block in res.res['parsing_res_list']:
-                        if isinstance(block, dict):
-                            block_content = block.get('block_content', '')
-                        else:
-                            block_content = getattr(block, 'block_content', '')
-                        if block_content:
-                            markdown_text += block_content + "\n"
+def ocr_single_image(image_path: str, groupname: Optional[str] = None, name: Optional[str] = None) -> str:
+    """
+    Process a single image with PPStructureV3 and return markdown
+    If groupname and name are provided, saves markdown to server/uploads/ocr-results/{groupname}/{name}.md
+    and JSON to server/uploads/ocr-results/{groupname}/{name}.json
+    Otherwise, nothing is written to disk
+    """
+    return ocr_batch_images([image_path], groupname=groupname, names=[name])[0]
+
+def header_keys(markdown_text: str) -> set:
+    """
+    Header lines of a page, whitespace-collapsed and lowercased, for comparing
+    headers across pages
+    """
+    return {
+        ' '.join(line.split()).lower()
+        for line in markdown_text.split('\n')
+        if line.lstrip().startswith('#')
+    }
+
+def combine_page_texts(all_markdown_texts: List[str]) -> str:
+    """
+    Combine the markdown of each page with page separators
+    For several pages, drops content repeated from the previous page
+    """
+    if len(all_markdown_texts) <= 1:
+        return all_markdown_texts[0] if all_markdown_texts else ""
+    
+    # Smart deduplication: Extract only new content from cumulative pages
+    # This handles cases where images contain cumulative content (each page has all previous + new)
+    deduplicated_texts = []
+    previous_normalized = ""
+    # Header keys of each page, built while scanning it so the next page can reuse them
+    page_headers = {}
+    
+    for idx, text in enumerate(all_markdown_texts):
+        # Normalize text for comparison (remove extra whitespace, newlines, page breaks)
+        normalized = ' '.join(text.replace('--- Page Break ---', '').split())
         
-        # Fix spacing errors
-        markdown_text = fix_title_spacing(markdown_text)
+        if not normalized:
+            # Empty page, skip it
+            continue
         
-        # Warn if OCR returned very little text (might indicate failure)
-        if len(markdown_text.strip()) < 50:
-            safe_print(f"[WARNING] OCR returned minimal text ({len(markdown_text)} chars). Image might be blank or OCR failed silently.")
+        if idx == 0:
+            # First page, always keep full content
+            deduplicated_texts.append(text)
+            previous_normalized = normalized
+        else:
+            # Check if current page contains all previous content (cumulative page)
+            if len(normalized) > len(previous_normalized) and normalized.startswith(previous_normalized):
+                # Current page is cumulative - extract only the new part
+                # Strategy: Find new section headers that weren't in the previous page
+                prev_headers = page_headers.pop(idx - 1, None)
+                if prev_headers is None:
+                    prev_headers = header_keys(all_markdown_texts[idx - 1])
+                current_headers = set()
+                
+                # Find new sections in current page
+                lines = text.split('\n')
+                new_lines = []
+                found_new_section = False
+                current_section_lines = []
+                
+                for line in lines:
+                    line_stripped = line.strip()
+                    if line_stripped.startswith('#'):
+                        # This is a header
+                        header_text = ' '.join(line_stripped.split()).lower()
+                        current_headers.add(header_text)
+                        if header_text not in prev_headers:
+                            # New section found - start collecting
+                            if current_section_lines:
+                                new_lines.extend(current_section_lines)
+                                current_section_lines = []
+                            found_new_section = True
+                            new_lines.append(line)
+                        else:
+                            # This header exists in previous page - stop collecting if we were
+                            if found_new_section and current_section_lines:
+                                new_lines.extend(current_section_lines)
+                            found_new_section = False
+                            current_section_lines = []
+                    else:
+                        if found_new_section:
+                            new_lines.append(line)
+                        elif not prev_headers:
+                            # No headers in previous page, collect everything after first new header
+                            current_section_lines.append(line)
+                page_headers[idx] = current_headers
+                
+                # Add any remaining lines from current section
+                if current_section_lines and found_new_section:
+                    new_lines.extend(current_section_lines)
+                
+                new_content = '\n'.join(new_lines).strip()
+                if new_content:
+                    deduplicated_texts.append(new_content)
+                else:
+                    # No new content found, keep full page
+                    deduplicated_texts.append(text)
+            else:
+                # Different content (not cumulative), keep it
+                deduplicated_texts.append(text)
+            previous_normalized = normalized
+    
+    if deduplicated_texts:
+        return "\n\n--- Page Break ---\n\n".join(deduplicated_texts)
+    # Fallback: use original if deduplication removed everything
+    return "\n\n--- Page Break ---\n\n".join(all_markdown_texts)
 
-        return markdown_text
-    except Exception as e:
-        raise Exception(f"Error processing image: {str(e)}")
+def get_document_info(document_id: str) -> Dict:
+    """
+    Fetch a document's info (group_name, file_name, ...) from the server
+    Results are reused for DOCUMENT_INFO_TTL seconds, so the pages of a
+    document don't each make a request
+    Raises an exception if the server doesn't return the document
+    """
+    now = time.monotonic()
+    with document_info_lock:
+        cached = document_info_cache.get(document_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    server_url = os.getenv("FILE_SERVER_URL", "http://localhost:3000")
+    server_url = server_url.rstrip('/')
+    internal_token = os.getenv("OCR_INTERNAL_TOKEN", "ocr-internal-secret")
+    
+    api_url = f"{server_url}/api/documents/ocr-info/{document_id}?token={internal_token}"
+    response = http_session.get(api_url, timeout=3)
+    if response.status_code != 200:
+        raise Exception(f"HTTP {response.status_code}")
+    data = response.json()
+    if not (data.get("success") and data.get("document")):
+        raise Exception("Invalid response format")
+    
+    doc = data["document"]
+    with document_info_lock:
+        # Drop expired entries so the cache doesn't grow with every document seen
+        for expired_id in [key for key, (expires_at, _) in document_info_cache.items() if expires_at <= now]:
+            del document_info_cache[expired_id]
+        document_info_cache[document_id] = (now + DOCUMENT_INFO_TTL, doc)
+    return doc
 
 def send_callback(callback_url: str, job_id: str, status: str, text: Optional[str] = None, error: Optional[str] = None, document_id: Optional[str] = None, extraction_result_id: Optional[str] = None, user_id: Optional[str] = None):
     """
@@ -322,7 +909,7 @@ def send_callback(callback_url: str, job_id: str, status: str, text: Optional[st
             payload["error"] = error
             payload["text"] = ""  # Empty text for failed jobs
         
-        response = requests.post(callback_url, json=payload, timeout=10)
+        response = http_session.post(callback_url, json=payload, timeout=10)
         response.raise_for_status()
         safe_print(f"[OK] Callback sent successfully to {callback_url}")
     except requests.exceptions.ConnectionError as e:
@@ -349,19 +936,17 @@ def process_ocr_job(job_id: str, image_paths: List[str]):
     name = None
     
     try:
-        with job_lock:
-            job = job_storage.get(job_id)
-            if not job:
-                safe_print(f"[WARNING] Job {job_id} not found in storage")
-                return
-            callback_url = job.get("callback_url")
-            document_id = job.get("document_id")
-            extraction_result_id = job.get("extraction_result_id")
-            user_id = job.get("user_id")
-            groupname = job.get("groupname")
-            name = job.get("name")
-            job["status"] = JOB_STATUS_PROCESSING
-            job["started_at"] = datetime.now().isoformat()
+        job = get_job(job_id)
+        if not job:
+            safe_print(f"[WARNING] Job {job_id} not found in storage")
+            return
+        callback_url = job.get("callback_url")
+        document_id = job.get("document_id")
+        extraction_result_id = job.get("extraction_result_id")
+        user_id = job.get("user_id")
+        groupname = job.get("groupname")
+        name = job.get("name")
+        update_job(job_id, status=JOB_STATUS_PROCESSING, started_at=time.time_ns())
         
         num_images = len(image_paths)
         safe_print(f"[PROCESSING] Starting OCR processing for job {job_id} ({num_images} image(s))")
@@ -369,41 +954,27 @@ def process_ocr_job(job_id: str, image_paths: List[str]):
         # ALWAYS fetch groupname/name from server API if document_id is available
         # This ensures we use the correct unique filename even if Dify Workflow 1 doesn't pass it correctly
         if document_id:
-            server_url = os.getenv("FILE_SERVER_URL", "http://localhost:3000")
-            server_url = server_url.rstrip('/')
-            internal_token = os.getenv("OCR_INTERNAL_TOKEN", "ocr-internal-secret")
-            
             try:
-                api_url = f"{server_url}/api/documents/ocr-info/{document_id}?token={internal_token}"
-                response = requests.get(api_url, timeout=3)
+                doc = get_document_info(document_id)
+                fetched_groupname = doc.get("group_name")
+                fetched_name = doc.get("file_name")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success") and data.get("document"):
-                        doc = data["document"]
-                        fetched_groupname = doc.get("group_name")
-                        fetched_name = doc.get("file_name")
-                        
-                        # ALWAYS use fetched values (they're the source of truth from database)
-                        if fetched_groupname:
-                            groupname = fetched_groupname
-                            safe_print(f"[INFO] Using groupname from server: {groupname}")
-                        if fetched_name:
-                            name = fetched_name
-                            safe_print(f"[INFO] Using file_name from server: {name} (unique per document)")
-                        
-                        if not groupname or not name:
-                            # Fallback: Use document_id if server doesn't have values
-                            safe_doc_id = re.sub(r'[^a-zA-Z0-9\-_]', '_', str(document_id))
-                            if not groupname:
-                                groupname = safe_doc_id
-                            if not name:
-                                name = safe_doc_id
-                            safe_print(f"[WARNING] Document missing group_name/file_name in DB, using document_id: groupname={groupname}, name={name}")
-                    else:
-                        raise Exception("Invalid response format")
-                else:
-                    raise Exception(f"HTTP {response.status_code}")
+                # ALWAYS use fetched values (they're the source of truth from database)
+                if fetched_groupname:
+                    groupname = fetched_groupname
+                    safe_print(f"[INFO] Using groupname from server: {groupname}")
+                if fetched_name:
+                    name = fetched_name
+                    safe_print(f"[INFO] Using file_name from server: {name} (unique per document)")
+                
+                if not groupname or not name:
+                    # Fallback: Use document_id if server doesn't have values
+                    safe_doc_id = re.sub(r'[^a-zA-Z0-9\-_]', '_', str(document_id))
+                    if not groupname:
+                        groupname = safe_doc_id
+                    if not name:
+                        name = safe_doc_id
+                    safe_print(f"[WARNING] Document missing group_name/file_name in DB, using document_id: groupname={groupname}, name={name}")
             except Exception as e:
                 # Only use fallback if we couldn't fetch from server
                 if not groupname or not name:
@@ -416,141 +987,55 @@ def process_ocr_job(job_id: str, image_paths: List[str]):
                 else:
                     safe_print(f"[INFO] Using provided groupname={groupname}, name={name} (server fetch failed but values provided)")
         
-        # Process all images with OCR
-        all_markdown_texts = []
-        for idx, image_path in enumerate(image_paths):
-            try:
-                safe_print(f"[PROCESSING] Processing image {idx + 1}/{num_images}: {os.path.basename(image_path)}")
-                # IMPORTANT: For single image processing (each document processed separately),
-                # use the name as-is (it's already unique per document from upload.ts)
-                # Only append page number if we're processing multiple images in ONE job
-                image_name = name
-                if num_images > 1 and name:
-                    # Multiple images in one job - append page number
-                    name_base = Path(name).stem
-                    name_ext = Path(name).suffix or ".md"
-                    image_name = f"{name_base}_page-{idx + 1:04d}{name_ext}"
-                # For single image (num_images == 1), use name as-is (already unique)
-                
-                safe_print(f"[INFO] Calling ocr_single_image with groupname={groupname}, name={image_name}")
-                markdown_text = ocr_single_image(image_path, groupname=groupname, name=image_name)
-                all_markdown_texts.append(markdown_text)
+        # IMPORTANT: For single image processing (each document processed separately),
+        # use the name as-is (it's already unique per document from upload.ts)
+        # Only append page number if we're processing multiple images in ONE job
+        image_names = []
+        for idx in range(num_images):
+            image_name = name
+            if num_images > 1 and name:
+                # Multiple images in one job - append page number
+                name_base = Path(name).stem
+                name_ext = Path(name).suffix or ".md"
+                image_name = f"{name_base}_page-{idx + 1:04d}{name_ext}"
+            image_names.append(image_name)
+        
+        # Process all images with OCR in one batched call
+        error_count = 0
+        try:
+            safe_print(f"[INFO] Calling ocr_batch_images with groupname={groupname}, names={image_names}")
+            all_markdown_texts = ocr_batch_images(image_paths, groupname=groupname, names=image_names)
+            for idx, markdown_text in enumerate(all_markdown_texts):
                 safe_print(f"[OK] Image {idx + 1}/{num_images} processed (text length: {len(markdown_text)} chars)")
-            except Exception as e:
-                import traceback
-                safe_print(f"[ERROR] Failed to process image {idx + 1}/{num_images}: {str(e)}")
-                safe_print(f"[ERROR] Traceback: {traceback.format_exc()}")
-                # Continue with other images even if one fails
-                all_markdown_texts.append(f"[ERROR: Failed to process image {idx + 1}]\n")
+        except Exception as e:
+            # Fall back to one image at a time so one bad image doesn't fail the whole job
+            safe_print(f"[WARNING] Batched OCR failed ({str(e)}), processing images one at a time")
+            all_markdown_texts = []
+            for idx, (image_path, image_name) in enumerate(zip(image_paths, image_names)):
+                try:
+                    safe_print(f"[PROCESSING] Processing image {idx + 1}/{num_images}: {os.path.basename(image_path)}")
+                    markdown_text = ocr_single_image(image_path, groupname=groupname, name=image_name)
+                    all_markdown_texts.append(markdown_text)
+                    safe_print(f"[OK] Image {idx + 1}/{num_images} processed (text length: {len(markdown_text)} chars)")
+                except Exception as e:
+                    import traceback
+                    safe_print(f"[ERROR] Failed to process image {idx + 1}/{num_images}: {str(e)}")
+                    safe_print(f"[ERROR] Traceback: {traceback.format_exc()}")
+                    # Continue with other images even if one fails
+                    error_count += 1
+                    all_markdown_texts.append(f"[ERROR: Failed to process image {idx + 1}]\n")
         
         # Combine all markdown texts with page separators
-        if num_images > 1:
-            # Smart deduplication: Extract only new content from cumulative pages
-            # This handles cases where images contain cumulative content (each page has all previous + new)
-            deduplicated_texts = []
-            previous_normalized = ""
-            
-            for idx, text in enumerate(all_markdown_texts):
-                # Normalize text for comparison (remove extra whitespace, newlines, page breaks)
-                normalized = ' '.join(text.replace('--- Page Break ---', '').split())
-                
-                if not normalized:
-                    # Empty page, skip it
-                    continue
-                
-                if idx == 0:
-                    # First page, always keep full content
-                    deduplicated_texts.append(text)
-                    previous_normalized = normalized
-                else:
-                    # Check if current page contains all previous content (cumulative page)
-                    if normalized.startswith(previous_normalized) and len(normalized) > len(previous_normalized):
-                        # Current page is cumulative - extract only the new part
-                        # Strategy: Find new section headers that weren't in the previous page
-                        prev_text = all_markdown_texts[idx - 1]
-                        prev_lines = prev_text.split('\n')
-                        prev_headers = set()
-                        for prev_line in prev_lines:
-                            if prev_line.strip().startswith('##') or prev_line.strip().startswith('#'):
-                                # Extract header text (normalize for comparison)
-                                header_text = ' '.join(prev_line.strip().split()).lower()
-                                prev_headers.add(header_text)
-                        
-                        # Find new sections in current page
-                        lines = text.split('\n')
-                        new_lines = []
-                        found_new_section = False
-                        current_section_lines = []
-                        
-                        for line in lines:
-                            line_stripped = line.strip()
-                            if line_stripped.startswith('##') or line_stripped.startswith('#'):
-                                # This is a header
-                                header_text = ' '.join(line_stripped.split()).lower()
-                                if header_text not in prev_headers:
-                                    # New section found - start collecting
-                                    if current_section_lines:
-                                        new_lines.extend(current_section_lines)
-                                        current_section_lines = []
-                                    found_new_section = True
-                                    new_lines.append(line)
-                                else:
-                                    # This header exists in previous page - stop collecting if we were
-                                    if found_new_section and current_section_lines:
-                                        new_lines.extend(current_section_lines)
-                                    found_new_section = False
-                                    current_section_lines = []
-                            else:
-                                if found_new_section:
-                                    new_lines.append(line)
-                                elif not prev_headers:
-                                    # No headers in previous page, collect everything after first new header
-                                    current_section_lines.append(line)
-                        
-                        # Add any remaining lines from current section
-                        if current_section_lines and found_new_section:
-                            new_lines.extend(current_section_lines)
-                        
-                        if new_lines:
-                            new_content = '\n'.join(new_lines).strip()
-                            if new_content:
-                                deduplicated_texts.append(new_content)
-                                previous_normalized = normalized
-                            else:
-                                # No new content found, keep full page
-                                deduplicated_texts.append(text)
-                                previous_normalized = normalized
-                        else:
-                            # Couldn't find new sections, keep full page
-                            deduplicated_texts.append(text)
-                            previous_normalized = normalized
-                    else:
-                        # Different content (not cumulative), keep it
-                        deduplicated_texts.append(text)
-                        previous_normalized = normalized
-            
-            if deduplicated_texts:
-                combined_markdown = "\n\n--- Page Break ---\n\n".join(deduplicated_texts)
-            else:
-                # Fallback: use original if deduplication removed everything
-                combined_markdown = "\n\n--- Page Break ---\n\n".join(all_markdown_texts)
-        else:
-            combined_markdown = all_markdown_texts[0] if all_markdown_texts else ""
+        combined_markdown = combine_page_texts(all_markdown_texts)
         
         # Warn if combined text is very short (might indicate all images failed)
         if len(combined_markdown.strip()) < 50:
             safe_print(f"[WARNING] Combined OCR text is very short ({len(combined_markdown)} chars). Check if images contain text or if OCR failed.")
-            # Count how many images had errors
-            error_count = sum(1 for text in all_markdown_texts if text.startswith("[ERROR:"))
             if error_count > 0:
                 safe_print(f"[WARNING] {error_count} of {num_images} image(s) had processing errors.")
         
         # Update job status
-        with job_lock:
-            if job_id in job_storage:
-                job_storage[job_id]["status"] = JOB_STATUS_COMPLETED
-                job_storage[job_id]["text"] = combined_markdown
-                job_storage[job_id]["completed_at"] = datetime.now().isoformat()
+        update_job(job_id, status=JOB_STATUS_COMPLETED, text=combined_markdown, completed_at=time.time_ns())
         
         safe_print(f"[OK] Job {job_id} completed successfully ({num_images} image(s), total text length: {len(combined_markdown)} chars)")
         
@@ -558,7 +1043,7 @@ def process_ocr_job(job_id: str, image_paths: List[str]):
         # Note: callback_url should point to Workflow 2's webhook trigger URL
         if callback_url:
             safe_print(f"[SEND] Sending callback for job {job_id} to {callback_url}")
-            send_callback(callback_url, job_id, JOB_STATUS_COMPLETED, text=combined_markdown, document_id=document_id, extraction_result_id=extraction_result_id, user_id=user_id)
+            callback_executor.submit(send_callback, callback_url, job_id, JOB_STATUS_COMPLETED, text=combined_markdown, document_id=document_id, extraction_result_id=extraction_result_id, user_id=user_id)
         else:
             safe_print(f"[INFO] No callback URL provided for job {job_id}")
             
@@ -570,23 +1055,18 @@ def process_ocr_job(job_id: str, image_paths: List[str]):
         safe_print(f"[ERROR] Job {job_id} failed: {error_msg}")
         safe_print(f"Traceback: {error_traceback}")
         
-        with job_lock:
-            if job_id in job_storage:
-                job_storage[job_id]["status"] = JOB_STATUS_FAILED
-                job_storage[job_id]["error"] = error_msg
-                job_storage[job_id]["failed_at"] = datetime.now().isoformat()
+        update_job(job_id, status=JOB_STATUS_FAILED, error=error_msg, failed_at=time.time_ns())
         
         # Send callback if URL is provided
         if callback_url:
             # Get metadata from job storage
-            with job_lock:
-                job = job_storage.get(job_id)
-                document_id = job.get("document_id") if job else None
-                extraction_result_id = job.get("extraction_result_id") if job else None
-                user_id = job.get("user_id") if job else None
+            job = get_job(job_id)
+            document_id = job.get("document_id") if job else None
+            extraction_result_id = job.get("extraction_result_id") if job else None
+            user_id = job.get("user_id") if job else None
             
             safe_print(f"[SEND] Sending error callback for job {job_id} to {callback_url}")
-            send_callback(callback_url, job_id, JOB_STATUS_FAILED, error=error_msg, document_id=document_id, extraction_result_id=extraction_result_id, user_id=user_id)
+            callback_executor.submit(send_callback, callback_url, job_id, JOB_STATUS_FAILED, error=error_msg, document_id=document_id, extraction_result_id=extraction_result_id, user_id=user_id)
     finally:
         # Clean up temporary files
         for image_path in image_paths:
@@ -597,8 +1077,108 @@ def process_ocr_job(job_id: str, image_paths: List[str]):
                 except Exception as e:
                     safe_print(f"[WARNING] Failed to clean up temp file {image_path}: {e}")
 
+def is_allowed_image(filename: str) -> bool:
+    """Whether the file has one of the ALLOWED_IMAGE_EXTENSIONS"""
+    stem, dot, extension = filename.rpartition('.')
+    # Like os.path.splitext, a leading dot (".png") isn't an extension
+    return bool(dot and stem.strip('.')) and extension.lower() in ALLOWED_IMAGE_EXTENSIONS
+
+def copy_upload(src, dst):
+    """
+    Copy an uploaded file's contents (from its current position) to dst
+    Uses os.sendfile when the upload has been spooled to a real file (Linux
+    can sendfile between regular files), else 1 MiB reads into the thread's
+    reused copy buffer
+    """
+    # SpooledTemporaryFile keeps small uploads in a BytesIO until they roll over to disk
+    raw = getattr(src, "_file", src)
+    try:
+        src_fd = raw.fileno()
+    except (AttributeError, OSError, ValueError):
+        src_fd = None
+    
+    if src_fd is not None and hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        dst.flush()
+        offset = raw.tell()
+        size = os.fstat(src_fd).st_size
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+        return
+    
+    if not hasattr(src, "readinto"):
+        shutil.copyfileobj(src, dst, UPLOAD_COPY_BUFSIZE)
+        return
+    buffer = getattr(upload_copy_buffers, "buffer", None)
+    if buffer is None:
+        buffer = upload_copy_buffers.buffer = memoryview(bytearray(UPLOAD_COPY_BUFSIZE))
+    while True:
+        n = src.readinto(buffer)
+        if not n:
+            break
+        dst.write(buffer[:n])
+
+def save_upload(file: UploadFile) -> str:
+    """Save an uploaded file to a temporary file with the same extension and return its path"""
+    suffix = os.path.splitext(file.filename)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, prefix=TEMP_UPLOAD_PREFIX, suffix=suffix) as tmp:
+        try:
+            copy_upload(file.file, tmp)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name
+
+def remove_temp_files(paths: List[str]):
+    """Remove staged upload files, ignoring ones that are already gone"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+async def stage_uploads(files: List[UploadFile]) -> List[str]:
+    """
+    Save uploads to temporary files (off the event loop) and return their paths
+    If saving any of them fails, the files already saved are removed
+    """
+    tmp_paths = []
+    try:
+        for file in files:
+            tmp_paths.append(await asyncio.to_thread(save_upload, file))
+    except BaseException:
+        remove_temp_files(tmp_paths)
+        raise
+    return tmp_paths
+
+def sweep_temp_uploads():
+    """Remove staged uploads older than TEMP_UPLOAD_MAX_AGE (left behind by crashes or cancelled requests)"""
+    cutoff = time.time() - TEMP_UPLOAD_MAX_AGE
+    for path in Path(tempfile.gettempdir()).glob(f"{TEMP_UPLOAD_PREFIX}*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                safe_print(f"[CLEANUP] Removed stale temp upload: {path.name}")
+        except OSError:
+            pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async def sweep_periodically():
+        while True:
+            await asyncio.to_thread(sweep_temp_uploads)
+            await asyncio.sleep(TEMP_UPLOAD_SWEEP_INTERVAL)
+    
+    sweeper = asyncio.create_task(sweep_periodically())
+    yield
+    sweeper.cancel()
+
 # Initialize FastAPI app
-app = FastAPI()
+# orjson encodes the large markdown payloads much faster than the stdlib json
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse if orjson is not None else JSONResponse)
 
 # Enable CORS for Dify integration
 app.add_middleware(
@@ -611,26 +1191,50 @@ app.add_middleware(
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    if pipeline is None:
+    """
+    Health check endpoint
+    Pipelines are loaded on the first OCR request, so this is only unhealthy
+    once loading one has failed
+    """
+    if pipeline_count == 0 and pipeline_init_error:
         return {
             "status": "unhealthy", 
             "service": "OCR API",
-            "error": "PaddleOCR pipeline not initialized. Check logs for initialization errors."
+            "error": f"PaddleOCR pipeline not initialized: {pipeline_init_error}. Check logs for initialization errors."
         }
-    return {"status": "healthy", "service": "OCR API"}
+    return {"status": "healthy", "service": "OCR API", "pipelines_loaded": pipeline_count}
+
+def stream_markdown(tmp_paths: List[str], groupname: Optional[str], image_names: List[Optional[str]]):
+    """
+    Yield each page's markdown (separated by page breaks) as soon as it is OCRed,
+    for the streaming /imgOcr response. Removes the temporary files when done.
+    """
+    try:
+        for idx, markdown_text in enumerate(iter_batch_markdown(tmp_paths, groupname=groupname, names=image_names)):
+            if idx > 0:
+                yield "\n\n--- Page Break ---\n\n"
+            yield markdown_text
+    except Exception as e:
+        # Headers are already sent, so report the error in the body
+        safe_print(f"[ERROR] Error streaming OCR results: {str(e)}")
+        yield f"\n\n[ERROR: OCR processing error: {str(e)}]"
+    finally:
+        remove_temp_files(tmp_paths)
 
 @app.post("/imgOcr")
 async def img_ocr(
     files: List[UploadFile] = File(...),
     groupname: Optional[str] = Query(None, description="Group name for organizing output files"),
-    name: Optional[str] = Query(None, description="Base name for output files (without extension)")
+    name: Optional[str] = Query(None, description="Base name for output files (without extension)"),
+    stream: bool = Query(False, description="Stream the markdown (text/markdown) page by page instead of returning JSON")
 ):
     """
     Synchronous OCR endpoint for single or multiple image files
     Accepts form-data with key 'files' (array) and image file(s) as value(s)
     Optional query parameters: groupname, name (for saving results to upload/ocrresults/{groupname}/{name}.md)
     Returns: {"text": "combined markdown content"}
+    With stream=true, returns the combined markdown as a chunked text/markdown
+    response, sending each page as soon as it is done.
     Note: This endpoint may timeout for large images or many files. Use /imgOcr/async for long-running jobs.
     """
     # Validate that at least one file is provided
@@ -641,30 +1245,26 @@ async def img_ocr(
         )
     
     # Validate all file extensions
-    invalid_files = []
-    for file in files:
-        file_ext = os.path.splitext(file.filename)[1].lower().lstrip('.')
-        if file_ext not in ALLOWED_IMAGE_EXTENSIONS:
-            invalid_files.append(file.filename)
-    
+    invalid_files = [file.filename for file in files if not is_allowed_image(file.filename)]
     if invalid_files:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type(s): {', '.join(invalid_files)}. Supported formats: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
+            detail=f"Unsupported file type(s): {', '.join(invalid_files)}. Supported formats: {ALLOWED_IMAGE_EXTENSIONS_TEXT}"
         )
     
-    # Process all images
-    all_markdown_texts = []
     tmp_paths = []
     
     try:
+        # Save uploaded files temporarily
+        tmp_paths = await stage_uploads(files)
+        
+        if len(files) == 1 and not stream:
+            # Single image (the usual case): no page names or page breaks
+            combined_markdown = await asyncio.to_thread(ocr_single_image, tmp_paths[0], groupname=groupname, name=name)
+            return {"text": combined_markdown}
+        
+        image_names = []
         for idx, file in enumerate(files):
-            # Save uploaded file temporarily
-            suffix = os.path.splitext(file.filename)[1].lower()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                shutil.copyfileobj(file.file, tmp)
-                tmp_paths.append(tmp.name)
-            
             # For multiple images, append page number to name if provided
             image_name = name
             if len(files) > 1 and name:
@@ -672,28 +1272,27 @@ async def img_ocr(
                 name_base = Path(name).stem
                 name_ext = Path(name).suffix or ".md"
                 image_name = f"{name_base}_page-{idx + 1:04d}{name_ext}"
-            
-            # Process image with OCR
-            markdown_text = ocr_single_image(tmp_paths[-1], groupname=groupname, name=image_name)
-            all_markdown_texts.append(markdown_text)
+            image_names.append(image_name)
+        
+        if stream:
+            # The generator runs in the threadpool and removes the files itself
+            response = StreamingResponse(stream_markdown(tmp_paths, groupname, image_names), media_type="text/markdown; charset=utf-8")
+            tmp_paths = []
+            return response
+        
+        # Process all images with OCR in one batched call, off the event loop
+        # so other requests (status polls, health checks) are still served
+        all_markdown_texts = await asyncio.to_thread(ocr_batch_images, tmp_paths, groupname=groupname, names=image_names)
         
         # Combine all markdown texts
-        if len(all_markdown_texts) > 1:
-            combined_markdown = "\n\n--- Page Break ---\n\n".join(all_markdown_texts)
-        else:
-            combined_markdown = all_markdown_texts[0]
+        combined_markdown = "\n\n--- Page Break ---\n\n".join(all_markdown_texts)
         
         return {"text": combined_markdown}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR processing error: {str(e)}")
     finally:
         # Clean up temporary files
-        for tmp_path in tmp_paths:
-            if os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except:
-                    pass
+        remove_temp_files(tmp_paths)
 
 @app.post("/imgOcr/async")
 async def img_ocr_async(
@@ -723,36 +1322,25 @@ async def img_ocr_async(
         )
     
     # Validate all file extensions
-    invalid_files = []
-    for file in files:
-        file_ext = os.path.splitext(file.filename)[1].lower().lstrip('.')
-        if file_ext not in ALLOWED_IMAGE_EXTENSIONS:
-            invalid_files.append(file.filename)
-    
+    invalid_files = [file.filename for file in files if not is_allowed_image(file.filename)]
     if invalid_files:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type(s): {', '.join(invalid_files)}. Supported formats: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
+            detail=f"Unsupported file type(s): {', '.join(invalid_files)}. Supported formats: {ALLOWED_IMAGE_EXTENSIONS_TEXT}"
         )
     
     # Generate job ID
     job_id = str(uuid.uuid4())
     
     # Save uploaded files temporarily
-    tmp_paths = []
-    filenames = []
-    for file in files:
-        suffix = os.path.splitext(file.filename)[1].lower()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            tmp_paths.append(tmp.name)
-            filenames.append(file.filename)
-    
-    # Create job entry
-    with job_lock:
-        job_storage[job_id] = {
+    tmp_paths = await stage_uploads(files)
+    filenames = [file.filename for file in files]
+    
+    try:
+        # Create job entry (off the event loop: with Redis this is a network round trip)
+        await asyncio.to_thread(create_job, job_id, {
             "status": JOB_STATUS_PENDING,
-            "created_at": datetime.now().isoformat(),
+            "created_at": time.time_ns(),
             "filename": ", ".join(filenames) if len(filenames) > 1 else filenames[0],
             "num_files": len(files),
             "callback_url": callback_url,
@@ -762,12 +1350,15 @@ async def img_ocr_async(
             "groupname": groupname,
             "name": name,
             "image_paths": tmp_paths
-        }
-    
-    # Start background processing thread
-    thread = threading.Thread(target=process_ocr_job, args=(job_id, tmp_paths), daemon=True)
-    thread.start()
-    safe_print(f"[START] Started background thread for job {job_id} ({len(files)} file(s), thread: {thread.name})")
+        })
+        
+        # Queue background processing (runs as soon as a pipeline is free)
+        job_executor.submit(process_ocr_job, job_id, tmp_paths)
+    except Exception:
+        # The job will never run, so nothing else would remove its files
+        remove_temp_files(tmp_paths)
+        raise
+    safe_print(f"[START] Queued background job {job_id} ({len(files)} file(s))")
     
     return {
         "job_id": job_id,
@@ -788,55 +1379,142 @@ async def get_job_status(job_id: str):
         "created_at": "...",
         "completed_at": "..." (if completed)
     }
+    Encoded responses for completed/failed jobs are cached; in-flight ones
+    are not. A cached body is only served while the job still exists, since
+    another worker may have deleted it
     """
-    with job_lock:
-        job = job_storage.get(job_id)
+    now = time.monotonic()
+    with status_cache_lock:
+        cached = status_response_cache.get(job_id)
+        if cached and cached[0] > now:
+            status_response_cache.move_to_end(job_id)
+        else:
+            cached = None
+    if cached:
+        if await asyncio.to_thread(job_exists, job_id):
+            return Response(cached[1], media_type="application/json", headers=STATUS_RESPONSE_HEADERS)
+        with status_cache_lock:
+            status_response_cache.pop(job_id, None)
     
+    job = await asyncio.to_thread(get_job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    body = encode_json(job_status_response(job_id, job))
+    if job["status"] not in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED):
+        return Response(body, media_type="application/json", headers=STATUS_RESPONSE_HEADERS)
+    
+    with status_cache_lock:
+        status_response_cache[job_id] = (now + STATUS_CACHE_TTL, body)
+        status_response_cache.move_to_end(job_id)
+        while len(status_response_cache) > STATUS_CACHE_MAX_ENTRIES:
+            status_response_cache.popitem(last=False)
+    return Response(body, media_type="application/json", headers=STATUS_RESPONSE_HEADERS)
+
+def encode_json(data) -> bytes:
+    """Encode a response body as compact UTF-8 JSON, like FastAPI's default response"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+@lru_cache(maxsize=1024)
+def format_epoch_seconds(epoch_seconds: int) -> str:
+    """ISO 8601 local time for a whole epoch second (cached, polls repeat the same ones)"""
+    return datetime.fromtimestamp(epoch_seconds).isoformat()
+
+def format_timestamp(epoch_ns) -> Optional[str]:
+    """Format a job timestamp (time.time_ns()) for API responses"""
+    # None if not set yet; jobs stored in Redis by older versions hold ISO strings
+    if not isinstance(epoch_ns, int):
+        return epoch_ns
+    return format_epoch_seconds(epoch_ns // 1_000_000_000)
+
+def job_status_response(job_id: str, job: Dict) -> Dict:
+    """Status response for a job (see get_job_status)"""
     response = {
         "job_id": job_id,
         "status": job["status"],
-        "created_at": job["created_at"]
+        "created_at": format_timestamp(job["created_at"])
     }
     
     if job["status"] == JOB_STATUS_COMPLETED:
         response["text"] = job.get("text", "")
-        response["completed_at"] = job.get("completed_at")
+        response["completed_at"] = format_timestamp(job.get("completed_at"))
     elif job["status"] == JOB_STATUS_FAILED:
         response["error"] = job.get("error", "Unknown error")
-        response["failed_at"] = job.get("failed_at")
+        response["failed_at"] = format_timestamp(job.get("failed_at"))
     elif job["status"] == JOB_STATUS_PROCESSING:
-        response["started_at"] = job.get("started_at")
+        response["started_at"] = format_timestamp(job.get("started_at"))
     
     return response
 
+@app.get("/imgOcr/events/{job_id}")
+async def job_events(job_id: str):
+    """
+    Server-Sent Events stream of an OCR job's status, instead of polling
+    GET /imgOcr/status/{job_id}
+    Sends the status response (same format as /imgOcr/status) now and on
+    every status change, and ends once the job is completed or failed
+    """
+    if not await asyncio.to_thread(get_job, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def stream():
+        changed = asyncio.Event()
+        listener = (asyncio.get_running_loop(), changed)
+        with job_listeners_lock:
+            job_listeners.setdefault(job_id, []).append(listener)
+        try:
+            last_status = None
+            while True:
+                changed.clear()
+                job = await asyncio.to_thread(get_job, job_id)
+                if not job:
+                    yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                    return
+                if job["status"] != last_status:
+                    last_status = job["status"]
+                    yield f"data: {json.dumps(job_status_response(job_id, job), ensure_ascii=False)}\n\n"
+                if last_status in (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED):
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=JOB_EVENTS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with job_listeners_lock:
+                listeners = job_listeners.get(job_id, [])
+                if listener in listeners:
+                    listeners.remove(listener)
+                if not listeners:
+                    job_listeners.pop(job_id, None)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.delete("/imgOcr/status/{job_id}")
 async def delete_job(job_id: str):
     """
     Delete a completed or failed job from storage
     """
-    with job_lock:
-        if job_id not in job_storage:
-            raise HTTPException(status_code=404, detail="Job not found")
-        
-        job = job_storage[job_id]
-        if job["status"] in [JOB_STATUS_PROCESSING, JOB_STATUS_PENDING]:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot delete job that is still pending or processing"
-            )
-        
-        # Clean up image file if it still exists
-        image_path = job.get("image_path")
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except:
-                pass
-        
-        del job_storage[job_id]
+    job = await asyncio.to_thread(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["status"] in [JOB_STATUS_PROCESSING, JOB_STATUS_PENDING]:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot delete job that is still pending or processing"
+        )
+    
+    # Clean up image file if it still exists
+    image_path = job.get("image_path")
+    if image_path and os.path.exists(image_path):
+        try:
+            os.remove(image_path)
+        except:
+            pass
+    
+    await asyncio.to_thread(delete_job_entry, job_id)
     
     return {"message": "Job deleted successfully"}
 
@@ -846,5 +1524,6 @@ if __name__ == "__main__":
     safe_print("Synchronous endpoint: POST http://localhost:8000/imgOcr")
     safe_print("Asynchronous endpoint: POST http://localhost:8000/imgOcr/async")
     safe_print("Status endpoint: GET http://localhost:8000/imgOcr/status/{job_id}")
+    safe_print("Status events (SSE): GET http://localhost:8000/imgOcr/events/{job_id}")
     safe_print("Health check: GET http://localhost:8000/health")
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,18 +1,43 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from paddleocr import PPStructureV3
 import os
+import asyncio
 import sys
 import io
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Set stdout encoding to UTF-8 for Windows console
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
+# Shared session so status callbacks reuse keep-alive connections
+callback_session = requests.Session()
+callback_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+callback_session.mount("http://", callback_adapter)
+callback_session.mount("https://", callback_adapter)
+
+# PPStructureV3 is not thread-safe (and one PDF at a time is what fits in
+# GPU memory), so OCR runs on a single worker thread
+ocr_executor = ThreadPoolExecutor(max_workers=1)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the pipeline when the worker starts, not on its first request
+    app.state.pipeline = PPStructureV3()
+    yield
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -23,14 +48,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize pipeline globally
-pipeline = None
-
-def get_pipeline():
-    global pipeline
-    if pipeline is None:
-        pipeline = PPStructureV3()
-    return pipeline
+def process_pdf(ocr_pipeline, input_path: Path, output_path: Path):
+    """
+    Run OCR on the PDF and save markdown/JSON for each page.
+    Blocking; pdf_ocr runs it on ocr_executor.
+    """
+    output = ocr_pipeline.predict(input=str(input_path))
+    
+    # Save markdown and images using res.save_to_markdown()
+    for idx, res in enumerate(output):
+        save_path = str(output_path)
+        res.save_to_json(save_path=save_path)
+        res.save_to_markdown(save_path=save_path)
+        print(f"[SAVE] Saved markdown and images to: {save_path}")
 
 @app.get("/health")
 async def health_check():
@@ -38,6 +68,7 @@ async def health_check():
 
 @app.post("/pdfOcr")
 async def pdf_ocr(
+    request: Request,
     groupname: str = Query(..., description="Group name for organizing output files"),
     filename: str = Query(..., description="File name for the PDF file"),
     extraction_result_id: str = Query(None, description="Extraction result ID for status callback"),
@@ -72,23 +103,19 @@ async def pdf_ocr(
                 detail="Unsupported file type. Only PDF files are supported."
             )
         
-        # Get pipeline
-        ocr_pipeline = get_pipeline()
-        
-        # Process PDF with OCR
-        print(f"[INFO] Processing PDF: {input_path}")
-        output = ocr_pipeline.predict(input=str(input_path))
+        # Get pipeline (loaded at startup)
+        ocr_pipeline = request.app.state.pipeline
         
         # Prepare output directory
         output_path = project_root / "server" / "uploads" / "ocr-results" / groupname
         output_path.mkdir(parents=True, exist_ok=True)
         
-        # Save markdown and images using res.save_to_markdown()
-        for idx, res in enumerate(output):
-            save_path = str(output_path)
-            res.save_to_json(save_path=save_path)
-            res.save_to_markdown(save_path=save_path)
-            print(f"[SAVE] Saved markdown and images to: {save_path}")
+        # Run the blocking OCR off the event loop so /health stays responsive;
+        # concurrent requests queue for the single OCR thread
+        print(f"[INFO] Processing PDF: {input_path}")
+        await asyncio.get_running_loop().run_in_executor(
+            ocr_executor, process_pdf, ocr_pipeline, input_path, output_path
+        )
         
         # Call callback endpoint to update extraction result status
         if callback_url and extraction_result_id:
@@ -98,7 +125,8 @@ async def pdf_ocr(
                 ocr_result_path = str(output_path.relative_to(project_root)).replace("\\", "/")
                 if ocr_result_path.startswith("server/"):
                     ocr_result_path = ocr_result_path[len("server/"):]
-                callback_response = requests.post(
+                callback_response = await asyncio.to_thread(
+                    callback_session.post,
                     callback_url,
                     json={
                         "extraction_result_id": extraction_result_id,
@@ -130,7 +158,8 @@ async def pdf_ocr(
         # Call callback endpoint to update extraction result status to failed
         if callback_url and extraction_result_id:
             try:
-                callback_response = requests.post(
+                callback_response = await asyncio.to_thread(
+                    callback_session.post,
                     callback_url,
                     json={
                         "extraction_result_id": extraction_result_id,
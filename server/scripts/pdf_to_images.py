@@ -9,9 +9,10 @@ import json
 import os
 os.environ['POPPLER_PATH'] = r'D:\Poppler\poppler-25.12.0\Library\bin'
 from pdf2image import convert_from_path
-from PIL import Image
 import io
 import base64
+import shutil
+import tempfile
 
 def main():
     if len(sys.argv) < 2:
@@ -27,6 +28,9 @@ def main():
     try:
         PDF_DPI = 200
         MAX_PAGES = 50
+        # Page image format: png (default) or jpeg (quality 90, several times
+        # smaller files, which is plenty for OCR)
+        IMAGE_FORMAT = 'jpeg' if os.environ.get('PDF_IMG_FMT', 'png').lower() in ('jpeg', 'jpg') else 'png'
         
         # Poppler path - explicitly set for Windows
         # Check environment variable first, then try common locations
@@ -49,16 +53,6 @@ def main():
         if not poppler_path:
             raise Exception("Poppler not found. Please set POPPLER_PATH environment variable or install Poppler at D:\\Poppler\\poppler-25.12.0\\Library\\bin")
         
-        # Convert PDF to images (similar to your Colab code)
-        # Explicitly pass poppler_path for Windows compatibility
-        pdf_pages = convert_from_path(
-            pdf_path,
-            dpi=PDF_DPI,
-            first_page=1,
-            last_page=MAX_PAGES,
-            poppler_path=poppler_path
-        )
-        
         # Get the directory where we'll save images
         pdf_dir = os.path.dirname(pdf_path)
         pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
@@ -67,14 +61,38 @@ def main():
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        image_paths = []
-        
-        for i, page in enumerate(pdf_pages, start=1):
-            # Save page as PNG
-            image_filename = f"page_{i}.png"
-            image_path = os.path.join(output_dir, image_filename)
-            page.save(image_path, 'PNG')
-            image_paths.append(image_path)
+        # Convert PDF to images (similar to your Colab code)
+        # Explicitly pass poppler_path for Windows compatibility
+        # pdftoppm writes the images straight to disk, split over one
+        # process per CPU (each converts a range of pages). It renders into a
+        # fresh directory, so leftovers from an earlier run or a concurrent
+        # conversion of the same PDF are never mixed in
+        render_dir = tempfile.mkdtemp(prefix=".render-", dir=output_dir)
+        try:
+            page_files = convert_from_path(
+                pdf_path,
+                dpi=PDF_DPI,
+                first_page=1,
+                last_page=MAX_PAGES,
+                poppler_path=poppler_path,
+                output_folder=render_dir,
+                output_file="pdf2image_page",
+                fmt=IMAGE_FORMAT,
+                jpegopt={"quality": 90, "progressive": False, "optimize": False} if IMAGE_FORMAT == 'jpeg' else None,
+                thread_count=os.cpu_count() or 1,
+                paths_only=True
+            )
+            
+            image_paths = []
+            
+            for i, page_file in enumerate(page_files, start=1):
+                # Name pages page_1.png, page_2.png, ... in page order
+                image_filename = f"page_{i}{os.path.splitext(page_file)[1]}"
+                image_path = os.path.join(output_dir, image_filename)
+                os.replace(page_file, image_path)
+                image_paths.append(image_path)
+        finally:
+            shutil.rmtree(render_dir, ignore_errors=True)
         
         # Return JSON with image paths
         result = {